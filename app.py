@@ -1,15 +1,24 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 import os
+import sys
 
+# Make the modules in src/ importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from memory_site import InMemorySite
+from static_files import SiteStaticFiles
 
-# Create the FastAPI app
-app = FastAPI()
-
-# Mount the static files directory
 
 static_dir = os.path.join(os.path.dirname(__file__), "public")
-app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+
+if os.environ.get("SERVE_FROM_MEMORY") == "1":
+    # Serve the whole site from memory with precomputed headers, switching to each new build once it is published
+    app = InMemorySite(static_dir)
+else:
+    # Create the FastAPI app
+    app = FastAPI()
+
+    # Mount the static files directory, sending the precompressed variants written by the build
+    app.mount("/", SiteStaticFiles(directory=static_dir, html=True), name="static")
 
 # Run the app  
 
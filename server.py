@@ -1,27 +1,119 @@
 import os
 import argparse
+import asyncio
+import hashlib
 import socket
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+import anyio
 import uvicorn
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import sys
 
-# Define the FastAPI app
-app = FastAPI()
+# Make the generator modules in src/ importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from main import CONTENT_DIR, MANIFEST_PATH, TEMPLATE_PATH, dir_static
+from livereload import LIVERELOAD_PATH, LiveReloadHub, inject_client, page_for_url
+from log import LOG_LEVELS, configure_logging, get_logger
+from manifest import Manifest
+from memory_site import InMemorySite
+from starlette.datastructures import Headers
+from static_files import SiteStaticFiles, is_not_modified, not_modified_response, unconditional_scope
+from watch import SiteWatcher
+
+# Browsers viewing the site, told to reload by the watcher after each rebuild
+hub = LiveReloadHub()
+
+
+class LiveReloadStaticFiles(SiteStaticFiles):
+    """
+    Serves the site like SiteStaticFiles, with the live reload client script injected into every HTML page.
+    HTML pages are always sent uncompressed, since the script has to be injected into them. Their ETag is the hash
+    of the injected page, as InMemorySite computes it, and they keep the Cache-Control and Last-Modified headers of
+    the file, so conditional requests for them are still answered with 304 Not Modified.
+    """
+    async def get_response(self, path, scope):
+        # The full response is needed to tell pages from other files, since the ETag of a page is not the one
+        # SiteStaticFiles compares the request with
+        request_headers = Headers(scope=scope)
+        response = await super().get_response(path, unconditional_scope(scope))
+        if not isinstance(response, FileResponse):
+            return response
+        if response.media_type != "text/html":
+            if response.status_code == 200 and is_not_modified(response.headers, request_headers):
+                return not_modified_response(response.headers)
+            return response
+        page_path = response.path
+        if "content-encoding" in response.headers:
+            page_path = os.path.splitext(page_path)[0]
+        # Reading the page would block the event loop, and with it every other request and live reload stream
+        body = inject_client(await anyio.to_thread.run_sync(_read_file, page_path))
+        headers = {
+            name: value for name, value in response.headers.items() if name in ("cache-control", "last-modified")
+        }
+        headers["etag"] = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if response.status_code == 200 and is_not_modified(headers, request_headers):
+            return not_modified_response(headers)
+        return Response(body, status_code=response.status_code, headers=headers, media_type="text/html")
+
 
-# Mount the static files directory
-static_dir = os.path.join(os.path.dirname(__file__), "public")
-app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+def _read_file(path):
+    with open(path, "rb") as page_file:
+        return page_file.read()
+
+
+async def livereload(page: str = "/"):
+    """
+    Streams server-sent events to a browser viewing a page, with one message each time the page is rebuilt.
+    """
+    page_path = page_for_url(page)
+
+    async def events():
+        queue = hub.subscribe(page_path)
+        try:
+            yield "retry: 1000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            hub.unsubscribe(page_path, queue)
 
-class HotReloadHandler(FileSystemEventHandler):
-    def __init__(self):
-        super().__init__()
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-    def on_any_event(self, event):
-        print("Change detected. Restarting server...")
-        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+# The project root, where main.py builds the site and records its sources relative to
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+static_dir = os.path.join(PROJECT_DIR, "public")
+
+
+def create_app(memory=False, directory=static_dir):
+    """
+    Creates the FastAPI app serving the site with live reload.
+
+    Args:
+        memory (bool, optional): Serve the site from memory with an InMemorySite, stored as `app.state.site`,
+            instead of from the filesystem. Defaults to False.
+        directory (str, optional): The public directory served. Defaults to the public directory next to this
+            script.
+    """
+    app = FastAPI()
+    app.add_api_route(LIVERELOAD_PATH, livereload)
+    app.state.site = None
+    if memory:
+        app.state.site = InMemorySite(directory, transform=inject_client)
+        app.mount("/", app.state.site, name="static")
+    else:
+        # Mount the static files directory
+        app.mount("/", LiveReloadStaticFiles(directory=directory, html=True), name="static")
+    return app
+
+
+# Define the FastAPI app
+app = create_app()
 
 def find_available_port(port):
     while True:
@@ -34,28 +126,67 @@ def find_available_port(port):
             port += 1
 
 def main():
-    parser = argparse.ArgumentParser(description="Start an ASGI server with hot-reloading.")
+    parser = argparse.ArgumentParser(description="Start an ASGI server that rebuilds the site as its sources change.")
     parser.add_argument("--port", type=int, default=8888, help="Port number")
-    parser.add_argument("--directory", type=str, default="public", help="Directory to serve")
+    parser.add_argument(
+        "--directory",
+        "--dir",
+        default=static_dir,
+        help="Public directory to serve (default: the public directory next to server.py)",
+    )
+    parser.add_argument("--no-watch", action="store_true", help="Serve the site without rebuilding it on changes")
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Load the site into memory and serve it from there, reloading it when a new build is published",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=tuple(LOG_LEVELS),
+        default="summary",
+        help="Log a summary of each rebuild, every rebuilt file (verbose) or only problems (quiet)",
+    )
     args = parser.parse_args()
+    configure_logging(args.log_level)
+    # The manifest records the sources relative to the project root, so the watcher has to run from there
+    # wherever the server is started; the served directory is resolved against the directory it was started from
+    public_dir = os.path.abspath(args.directory)
+    os.chdir(PROJECT_DIR)
 
     port = find_available_port(args.port)
-    directory = args.directory
+    server_app = create_app(args.memory, public_dir)
+    site = server_app.state.site
+    if site is not None:
+        site.start()
 
-    # Set up the watchdog observer
-    event_handler = HotReloadHandler()
-    observer = Observer()
-    observer.schedule(event_handler, path=directory, recursive=True)
-    observer.start()
+    # Rebuild the affected pages in this process whenever the content, static files or template change, then
+    # tell the browsers viewing them to reload. The server keeps running: the site is served from the public
+    # directory, which the rebuilds update in place.
+    watcher = None
+    if not args.no_watch:
+        manifest = Manifest.load(MANIFEST_PATH)
+        if not manifest.pages:
+            get_logger("server").warning(
+                "No build manifest found at %s, run 'python src/main.py' before watching", MANIFEST_PATH
+            )
+        watcher = SiteWatcher(
+            CONTENT_DIR, TEMPLATE_PATH, dir_static, public_dir, manifest, compress=manifest.compressed
+        )
+        if site is not None:
+            # Rebuilds update the published generation in place, so reload what changed before the browsers ask
+            watcher.listeners.append(site.update)
+        watcher.listeners.append(hub.notify)
+        watcher.start()
 
     try:
-        # Start the uvicorn server with the correct import string
-        uvicorn.run("server:app", host="0.0.0.0", port=port, reload=True, reload_dirs=[directory])
+        uvicorn.run(server_app, host="0.0.0.0", port=port)
     except KeyboardInterrupt:
         pass
     finally:
-        observer.stop()
-        observer.join()
+        if watcher is not None:
+            watcher.stop()
+        if site is not None:
+            site.stop()
 
 if __name__ == "__main__":
     main()
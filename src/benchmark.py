@@ -0,0 +1,578 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import markdown_blocks
+from copy_static import sync_files_recursive
+from generate import extract_title, find_pages, generate_pages_recursive
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import split_nodes_image, split_nodes_link, text_to_textnodes
+from markdown_blocks import block_to_html_node, markdown_to_blocks, markdown_to_html_node
+from template import load_template
+from textnode import TextNode, text_type_text
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage(), the peak RSS is not reported there
+    resource = None
+
+# The stages of a page build timed by `benchmark_build()`, in pipeline order
+BUILD_STAGES = (
+    "read",
+    "markdown_to_blocks",
+    "text_to_textnodes",
+    "block_to_html_node",
+    "to_html",
+    "template_fill",
+    "write",
+    "static_copy",
+)
+
+SYNTHETIC_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title> {{ Title }} </title>
+    <link href="/index.css" rel="stylesheet">
+</head>
+<body>
+    <article>
+        {{ Content }}
+    </article>
+</body>
+</html>
+"""
+
+WORDS = (
+    "the ring fellowship shire hobbit elves dwarves mordor wizard journey river mountain "
+    "forest kingdom tower road friendship power legend history language map song"
+).split()
+
+
+def synthetic_paragraph(rng, words=60, link_density=0.03, link_targets=None):
+    """
+    Generates a paragraph of random words with inline bold, italic, code and link markup.
+
+    Args:
+        rng (random.Random): The random number generator to use.
+        words (int, optional): The number of words in the paragraph. Defaults to 60.
+        link_density (float, optional): The fraction of words that are links. Defaults to 0.03.
+        link_targets (list, optional): The URLs links point to. Defaults to "/" followed by a random word.
+
+    Returns:
+        str: The markdown paragraph.
+    """
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.10:
+            word = f"*{word}*"
+        elif roll < 0.13:
+            word = f"`{word}`"
+        elif roll < 0.13 + link_density:
+            target = rng.choice(link_targets) if link_targets else f"/{rng.choice(WORDS)}"
+            word = f"[{word}]({target})"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def synthetic_markdown(size, seed=0, link_density=0.03, list_density=0.2, code_density=0.05, link_targets=None,
+                       title="Synthetic Document"):
+    """
+    Generates a markdown document of roughly the given size with a title, headings, paragraphs,
+    lists, quotes and code blocks.
+
+    Args:
+        size (int): The approximate size of the document in characters.
+        seed (int, optional): The seed for the random number generator. Defaults to 0.
+        link_density (float, optional): The fraction of words that are links. Defaults to 0.03.
+        list_density (float, optional): The fraction of blocks that are lists, half of them ordered. Defaults to 0.2.
+        code_density (float, optional): The fraction of blocks that are code blocks. Defaults to 0.05.
+        link_targets (list, optional): The URLs links point to. Defaults to "/" followed by a random word.
+        title (str, optional): The title of the document. Defaults to "Synthetic Document".
+
+    Returns:
+        str: The markdown document.
+    """
+    rng = random.Random(seed)
+    blocks = [f"# {title}"]
+    length = len(blocks[0])
+
+    def paragraph(words):
+        return synthetic_paragraph(rng, words, link_density, link_targets)
+
+    while length < size:
+        roll = rng.random()
+        if roll < 0.1:
+            block = f"## {paragraph(5)}"
+        elif roll < 0.1 + list_density / 2:
+            block = "\n".join(f"- {paragraph(8)}" for _ in range(rng.randint(2, 6)))
+        elif roll < 0.1 + list_density:
+            block = "\n".join(f"{i}. {paragraph(8)}" for i in range(1, rng.randint(3, 7)))
+        elif roll < 0.15 + list_density:
+            block = "\n".join(f"> {paragraph(10)}" for _ in range(rng.randint(1, 3)))
+        elif roll < 0.15 + list_density + code_density:
+            block = "```\n" + "\n".join(f"print({rng.choice(WORDS)!r})" for _ in range(4)) + "\n```"
+        else:
+            block = paragraph(60)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def generate_content_tree(root, pages=200, page_size=4000, seed=0, link_density=0.03, list_density=0.2,
+                          code_density=0.05, static_files=20, static_size=64 << 10, pages_per_section=20):
+    """
+    Writes a synthetic site: a content directory of markdown pages linking to each other, a static directory
+    and a template.
+
+    Args:
+        root (str): The directory to write the site to. It gets "content", "static" and "template.html".
+        pages (int, optional): The number of pages. Defaults to 200.
+        page_size (int, optional): The approximate size of each page in characters. Defaults to 4000.
+        seed (int, optional): The seed for the random number generator. Defaults to 0.
+        link_density (float, optional): The fraction of words that are links. Defaults to 0.03.
+        list_density (float, optional): The fraction of blocks that are lists. Defaults to 0.2.
+        code_density (float, optional): The fraction of blocks that are code blocks. Defaults to 0.05.
+        static_files (int, optional): The number of static files. Defaults to 20.
+        static_size (int, optional): The size of each static file in bytes. Defaults to 64 KB.
+        pages_per_section (int, optional): The number of pages in each content subdirectory. Defaults to 20.
+
+    Returns:
+        dict: The paths of the "content" and "static" directories and of the "template".
+
+    The same arguments always produce the same site.
+    """
+    rng = random.Random(seed)
+    names = []
+    for i in range(pages):
+        names.append("index" if i == 0 else f"section-{i // pages_per_section}/page-{i % pages_per_section}")
+    link_targets = ["/" if name == "index" else f"/{name}.html" for name in names]
+
+    paths = {
+        "content": os.path.join(root, "content"),
+        "static": os.path.join(root, "static"),
+        "template": os.path.join(root, "template.html"),
+    }
+    for i, name in enumerate(names):
+        path = os.path.join(paths["content"], f"{name}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        markdown = synthetic_markdown(
+            page_size, seed * 1_000_003 + i, link_density, list_density, code_density, link_targets, f"Page {i}"
+        )
+        with open(path, "w", encoding="utf-8") as page_file:
+            page_file.write(markdown)
+    for i in range(static_files):
+        path = os.path.join(paths["static"], "assets", f"asset-{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as static_file:
+            static_file.write(rng.randbytes(static_size))
+    with open(paths["template"], "w", encoding="utf-8") as template_file:
+        template_file.write(SYNTHETIC_TEMPLATE)
+    return paths
+
+
+def count_nodes(node):
+    """
+    Counts the nodes in an HTML node tree.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+
+    Returns:
+        int: The number of nodes in the tree, including the root.
+    """
+    count = 1
+    for child in node.children or ():
+        count += count_nodes(child)
+    return count
+
+
+def bytes_per_node(factory, count=100_000):
+    """
+    Measures the memory allocated per instance by a node constructor, excluding the strings it refers to.
+
+    Args:
+        factory (callable): Called without arguments to create one node.
+        count (int, optional): The number of nodes to create. Defaults to 100000.
+
+    Returns:
+        float: The average number of bytes allocated per node.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Do not count the list holding the nodes
+    return (after - before - sys.getsizeof(nodes)) / len(nodes)
+
+
+def peak_rss_mb():
+    """
+    Returns:
+        float: The peak resident set size of this process in megabytes, or None where the resource module is
+        not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_memory(size):
+    """
+    Measures the memory used by the nodes of a synthetic markdown document.
+
+    Args:
+        size (int): The approximate size of the document in characters.
+
+    Returns:
+        dict: The per-node sizes of each node class, the number of nodes and traced bytes of the
+        document's HTML node tree and text nodes, and the peak RSS of the process.
+    """
+    text = "shared text"
+    children = [LeafNode(None, text)]
+    results = {
+        "document_bytes": size,
+        "bytes_per_node": {
+            "TextNode": bytes_per_node(lambda: TextNode(text, text_type_text)),
+            "LeafNode": bytes_per_node(lambda: LeafNode("b", text)),
+            "ParentNode": bytes_per_node(lambda: ParentNode("p", children)),
+        },
+    }
+
+    markdown = synthetic_markdown(size)
+    # Build everything once untraced, so the peak RSS is not inflated by tracemalloc
+    tree = markdown_to_html_node(markdown)
+    text_nodes = [text_to_textnodes(block) for block in markdown_to_blocks(markdown)]
+    results["peak_rss_mb"] = peak_rss_mb()
+    del tree, text_nodes
+
+    tracemalloc.start()
+    tree = markdown_to_html_node(markdown)
+    results["html_nodes"] = count_nodes(tree)
+    results["html_tree_bytes"] = tracemalloc.get_traced_memory()[0]
+    del tree
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    text_nodes = [text_to_textnodes(block) for block in markdown_to_blocks(markdown)]
+    results["text_nodes"] = sum(len(nodes) for nodes in text_nodes)
+    results["text_nodes_bytes"] = tracemalloc.get_traced_memory()[0]
+    del text_nodes
+    tracemalloc.stop()
+    return results
+
+
+def print_memory_report(results):
+    print(f"Synthetic document: {results['document_bytes'] / (1 << 20):.1f} MB of markdown")
+    for name, size in results["bytes_per_node"].items():
+        print(f"  {name:<10} {size:8.1f} bytes/node")
+    print(
+        f"  HTML tree  {results['html_nodes']:>9} nodes  {results['html_tree_bytes'] / (1 << 20):8.1f} MB"
+        f"  ({results['html_tree_bytes'] / results['html_nodes']:.1f} bytes/node incl. strings)"
+    )
+    print(
+        f"  TextNodes  {results['text_nodes']:>9} nodes  {results['text_nodes_bytes'] / (1 << 20):8.1f} MB"
+        f"  ({results['text_nodes_bytes'] / results['text_nodes']:.1f} bytes/node incl. strings)"
+    )
+    if results["peak_rss_mb"] is not None:
+        print(f"  Peak RSS   {results['peak_rss_mb']:.1f} MB")
+
+
+def benchmark_split(counts=(1000, 16000), repeat=3):
+    """
+    Times `split_nodes_link()` and `split_nodes_image()` on texts with a growing number of matches.
+
+    Args:
+        counts (tuple, optional): The numbers of matches to time. Defaults to (1000, 16000).
+        repeat (int, optional): The number of runs of each, the fastest is kept. Defaults to 3.
+
+    Returns:
+        dict: Maps the name of each splitter to a dict of the seconds it took for each number of matches.
+
+    The time should grow linearly with the number of matches. The old splitter, which split the remaining text once
+    per match, took close to 100 times as long for 16 times the links.
+    """
+    cases = (
+        (split_nodes_link, "see [link](https://boot.dev) "),
+        (split_nodes_image, "see ![image](https://i.imgur.com/zjjcJKZ.png) "),
+    )
+    results = {}
+    for split, chunk in cases:
+        results[split.__name__] = times = {}
+        for count in counts:
+            nodes = [TextNode(chunk * count, text_type_text)]
+            times[count] = min(timeit.repeat(lambda: split(nodes), number=1, repeat=repeat))
+    return results
+
+
+def print_split_report(results):
+    for name, times in results.items():
+        counts = list(times)
+        line = "  ".join(f"{count:>6} matches {times[count] * 1000:8.1f} ms" for count in counts)
+        ratio = times[counts[-1]] / times[counts[0]]
+        print(f"  {name:<18} {line}  ({ratio:.1f}x for {counts[-1] / counts[0]:g}x the matches)")
+
+
+def benchmark_build(paths, output_dir):
+    """
+    Builds a site once, timing each stage of the page pipeline separately.
+
+    Args:
+        paths (dict): The "content", "static" and "template" paths of the site, as returned by
+            `generate_content_tree()`.
+        output_dir (str): An empty directory to build the site into.
+
+    Returns:
+        dict: The number of "pages", the "markdown_bytes" read and the seconds spent in each of BUILD_STAGES.
+
+    The stages are run one after the other for each page, the way `generate_page()` runs them. The time spent in
+    `text_to_textnodes()` is measured inside `block_to_html_node()` and subtracted from it, so the two are
+    reported separately.
+    """
+    stages = dict.fromkeys(BUILD_STAGES, 0.0)
+    inline = [0.0]
+    text_to_textnodes_untimed = markdown_blocks.text_to_textnodes
+
+    def timed_text_to_textnodes(text):
+        started = time.perf_counter()
+        try:
+            return text_to_textnodes_untimed(text)
+        finally:
+            inline[0] += time.perf_counter() - started
+
+    pages = find_pages(paths["content"], output_dir)
+    template = load_template(paths["template"])
+    markdown_bytes = 0
+    markdown_blocks.text_to_textnodes = timed_text_to_textnodes
+    try:
+        for from_path, dest_path in pages:
+            started = time.perf_counter()
+            with open(from_path, encoding="utf-8") as source_file:
+                markdown = source_file.read()
+            markdown_bytes += len(markdown)
+            read = time.perf_counter()
+            blocks = markdown_to_blocks(markdown)
+            split = time.perf_counter()
+            inline_before = inline[0]
+            node = ParentNode("div", [block_to_html_node(block) for block in blocks])
+            parsed = time.perf_counter()
+            html = node.to_html()
+            serialized = time.perf_counter()
+            page = template.render({"Title": extract_title(markdown), "Content": html})
+            filled = time.perf_counter()
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w", encoding="utf-8") as dest_file:
+                dest_file.write(page)
+            written = time.perf_counter()
+
+            page_inline = inline[0] - inline_before
+            stages["read"] += read - started
+            stages["markdown_to_blocks"] += split - read
+            stages["text_to_textnodes"] += page_inline
+            stages["block_to_html_node"] += parsed - split - page_inline
+            stages["to_html"] += serialized - parsed
+            stages["template_fill"] += filled - serialized
+            stages["write"] += written - filled
+
+        started = time.perf_counter()
+        sync_files_recursive(paths["static"], output_dir, strategy="copy")
+        stages["static_copy"] = time.perf_counter() - started
+    finally:
+        markdown_blocks.text_to_textnodes = text_to_textnodes_untimed
+    return {"pages": len(pages), "markdown_bytes": markdown_bytes, "stages": stages}
+
+
+def benchmark_site(config, repeat=3, directory=None):
+    """
+    Generates a synthetic site and builds it several times, keeping the fastest time of each stage.
+
+    Args:
+        config (dict): Keyword arguments for `generate_content_tree()`, without the root directory.
+        repeat (int, optional): The number of builds. Defaults to 3.
+        directory (str, optional): The directory to generate the site in and keep it. Defaults to a temporary
+            directory that is removed afterwards.
+
+    Returns:
+        dict: The "config", "python" version, number of "pages" and "markdown_bytes", the fastest time of each
+        of the "stages", their "total" and the time of a complete build with `generate_pages_recursive()`
+        ("end_to_end"), all in seconds.
+    """
+    with contextlib.ExitStack() as stack:
+        if directory is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+        paths = generate_content_tree(directory, **config)
+        results = None
+        end_to_end = []
+        for run in range(repeat):
+            build = benchmark_build(paths, os.path.join(directory, f"public-{run}"))
+            if results is None:
+                results = build
+            else:
+                for stage, seconds in build["stages"].items():
+                    results["stages"][stage] = min(results["stages"][stage], seconds)
+            started = time.perf_counter()
+            generate_pages_recursive(paths["content"], paths["template"], os.path.join(directory, f"site-{run}"))
+            end_to_end.append(time.perf_counter() - started)
+
+    results["config"] = config
+    results["python"] = platform.python_version()
+    results["total"] = sum(results["stages"].values())
+    results["end_to_end"] = min(end_to_end)
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold=1.25):
+    """
+    Compares the stage times of a benchmark with a stored baseline.
+
+    Args:
+        results (dict): The results of `benchmark_site()`.
+        baseline (dict): Earlier results of `benchmark_site()`.
+        threshold (float, optional): The ratio to the baseline above which a stage counts as a regression.
+            Defaults to 1.25.
+
+    Returns:
+        list: A (name, baseline seconds, current seconds, ratio, regressed) tuple for each stage, the total and
+        the end-to-end build, skipping those missing from the baseline.
+    """
+    current = dict(results["stages"], total=results["total"], end_to_end=results["end_to_end"])
+    previous = dict(baseline.get("stages", {}), total=baseline.get("total"), end_to_end=baseline.get("end_to_end"))
+    comparison = []
+    for name, seconds in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        ratio = seconds / before
+        comparison.append((name, before, seconds, ratio, ratio > threshold))
+    return comparison
+
+
+def print_build_report(results, comparison=None):
+    print(
+        f"Synthetic site: {results['pages']} pages, {results['markdown_bytes'] / (1 << 20):.1f} MB of markdown"
+        f" (Python {results['python']})"
+    )
+    baseline = {name: (before, ratio, regressed) for name, before, _, ratio, regressed in comparison or ()}
+    for name in (*BUILD_STAGES, "total", "end_to_end"):
+        seconds = results["stages"].get(name, results.get(name))
+        line = f"  {name:<20} {seconds * 1000:10.1f} ms"
+        if name in baseline:
+            before, ratio, regressed = baseline[name]
+            line += f"  baseline {before * 1000:10.1f} ms  {ratio:5.2f}x"
+            if regressed:
+                line += "  REGRESSION"
+        print(line)
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages (default: 200)")
+    parser.add_argument("--page-size", type=int, default=4000, help="Approximate characters per page (default: 4000)")
+    parser.add_argument("--link-density", type=float, default=0.03, help="Fraction of words that are links")
+    parser.add_argument("--list-density", type=float, default=0.2, help="Fraction of blocks that are lists")
+    parser.add_argument("--code-density", type=float, default=0.05, help="Fraction of blocks that are code blocks")
+    parser.add_argument("--static-files", type=int, default=20, help="Number of static files (default: 20)")
+    parser.add_argument("--static-size-kb", type=int, default=64, help="Size of each static file in KB (default: 64)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated content (default: 0)")
+
+
+def corpus_config(args):
+    return {
+        "pages": args.pages,
+        "page_size": args.page_size,
+        "seed": args.seed,
+        "link_density": args.link_density,
+        "list_density": args.list_density,
+        "code_density": args.code_density,
+        "static_files": args.static_files,
+        "static_size": args.static_size_kb << 10,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the static site generator.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    memory = subparsers.add_parser("memory", help="Measure the memory used by the nodes of a large document")
+    memory.add_argument("--size-mb", type=float, default=5, help="Size of the synthetic document in MB")
+    memory.add_argument("--json", action="store_true", help="Print the results as JSON")
+    build = subparsers.add_parser("build", help="Time each stage of building a synthetic site")
+    add_corpus_arguments(build)
+    build.add_argument("--repeat", type=int, default=3, help="Number of builds, the fastest is kept (default: 3)")
+    build.add_argument("--dir", help="Generate the site in this directory and keep it")
+    build.add_argument("--json", action="store_true", help="Print the results as JSON")
+    build.add_argument("--output", metavar="FILE", help="Write the results as JSON to FILE, e.g. to use as a baseline")
+    build.add_argument("--baseline", metavar="FILE", help="Compare with results written by --output")
+    build.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Exit with status 1 if a stage takes more than this times its baseline (default: 1.25)",
+    )
+    split = subparsers.add_parser("split", help="Time the image and link splitters on a growing number of matches")
+    split.add_argument(
+        "--counts", type=int, nargs="+", default=[1000, 16000], help="Numbers of matches (default: 1000 16000)"
+    )
+    split.add_argument("--json", action="store_true", help="Print the results as JSON")
+    corpus = subparsers.add_parser("corpus", help="Write a synthetic site without building it")
+    corpus.add_argument("dir", help="Directory to write content/, static/ and template.html to")
+    add_corpus_arguments(corpus)
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "corpus":
+        paths = generate_content_tree(args.dir, **corpus_config(args))
+        print(f"Wrote {args.pages} pages to {paths['content']}")
+        return 0
+
+    if args.benchmark == "split":
+        results = benchmark_split(tuple(args.counts))
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_split_report(results)
+        return 0
+
+    if args.benchmark == "memory":
+        results = benchmark_memory(int(args.size_mb * (1 << 20)))
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_memory_report(results)
+        return 0
+
+    results = benchmark_site(corpus_config(args), args.repeat, args.dir)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != results["config"]:
+            print(f"Warning: {args.baseline} was measured on a different synthetic site", file=sys.stderr)
+        comparison = compare_to_baseline(results, baseline, args.threshold)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.json:
+        print(json.dumps(dict(results, baseline=comparison and [
+            {"stage": name, "baseline": before, "current": seconds, "ratio": ratio, "regressed": regressed}
+            for name, before, seconds, ratio, regressed in comparison
+        ]), indent=2))
+    else:
+        print_build_report(results, comparison)
+    return 1 if comparison and any(regressed for *_, regressed in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
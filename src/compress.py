@@ -0,0 +1,245 @@
+import contextlib
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from etags import ETAGS_FILE
+from log import get_logger
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, only gzip variants are written without it
+    brotli = None
+
+logger = get_logger(__name__)
+
+# Outputs worth compressing; images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".ico", ".wasm")
+
+# Files smaller than this fit in a single packet anyway
+MIN_COMPRESS_SIZE = 256
+
+# Content encodings of the precompressed variants by file suffix, in order of preference
+ENCODINGS = {".br": "br", ".gz": "gzip"}
+
+
+def compress_outputs(output_dir, paths=None, workers=8, assets=()):
+    """
+    Writes precompressed .gz siblings, and .br siblings if brotli is installed, next to the compressible files
+    of a build.
+
+    Args:
+        output_dir (str): The output directory of the build.
+        paths (iterable, optional): The output paths to compress, relative to output_dir, for callers that know
+            which files changed, such as the watch mode. Siblings of paths that no longer exist are removed.
+            Defaults to every file in output_dir, in which case siblings without a source file are removed too.
+        workers (int, optional): The number of threads compressing files concurrently. Defaults to 8.
+        assets (set, optional): The output paths of the static files, relative to output_dir, such as
+            `Manifest.assets`. They are published as they are: a shipped archive like downloads/site.tar.gz is
+            neither removed as an orphaned sibling nor overwritten by a compressed variant. Defaults to none.
+
+    Returns:
+        dict: The number of files that were "compressed", "unchanged" and "removed".
+
+    Each sibling gets the modification time of the file it was compressed from, so a file whose sibling has
+    the same modification time is not compressed again. Since an incremental build starts from a hardlinked
+    clone of the previous one, only the pages and static files that were written by this build are compressed.
+    Siblings are written to a temporary file and renamed into place, and a sibling that would not be smaller
+    than its source is not written at all. Only files that this function could have written are ever removed:
+    a .gz or .br whose base name is compressible and which is not a static asset.
+    """
+    counts = {"compressed": 0, "unchanged": 0, "removed": 0}
+    suffixes = [suffix for suffix in ENCODINGS if suffix != ".br" or brotli is not None]
+    if paths is None:
+        paths = []
+        for dirpath, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                paths.append(os.path.relpath(os.path.join(dirpath, filename), output_dir))
+    changed = []
+    for relative_path in paths:
+        path = os.path.join(output_dir, relative_path)
+        if path.endswith(tuple(ENCODINGS)):
+            source_path = os.path.splitext(path)[0]
+            if (
+                relative_path not in assets
+                and is_compressible(source_path)
+                and not os.path.exists(source_path)
+                and _remove(path)
+            ):
+                counts["removed"] += 1
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if is_compressible(path):
+                counts["removed"] += sum(
+                    _remove(path + suffix) for suffix in ENCODINGS if relative_path + suffix not in assets
+                )
+            continue
+        if not is_compressible(path) or stat.st_size < MIN_COMPRESS_SIZE or relative_path == ETAGS_FILE:
+            continue
+        for suffix in suffixes:
+            if relative_path + suffix in assets:
+                continue
+            try:
+                unchanged = os.stat(path + suffix).st_mtime_ns == stat.st_mtime_ns
+            except FileNotFoundError:
+                unchanged = False
+            if unchanged:
+                counts["unchanged"] += 1
+            else:
+                changed.append((path, suffix, stat))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        sizes = list(executor.map(lambda task: _compress_file(*task), changed))
+    elapsed = time.perf_counter() - started
+    counts["compressed"] = len(changed)
+
+    summary = f"{counts['compressed']} compressed variants written"
+    if changed:
+        before = sum(stat.st_size for _, _, stat in changed) / (1 << 20)
+        summary += f" ({before:.1f} MB -> {sum(sizes) / (1 << 20):.1f} MB in {elapsed:.2f}s)"
+    logger.info("%s, %d unchanged, %d removed", summary, counts["unchanged"], counts["removed"], extra=counts)
+    return counts
+
+
+def is_compressible(path):
+    """
+    Args:
+        path (str): The path of an output file.
+
+    Returns:
+        bool: True if the file type is worth compressing.
+    """
+    return path.lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Parses an Accept-Encoding request header.
+
+    Args:
+        accept_encoding (str): The header value, or None if the request has none.
+
+    Returns:
+        dict: Maps the content codings the client accepts, lowercased and possibly including "*", to their q-value.
+        Codings with q=0 are left out.
+
+    Example:
+        >>> accepted_encodings("gzip, deflate;q=0.5, br;q=0")
+        {'gzip': 1.0, 'deflate': 0.5}
+    """
+    return {coding: quality for coding, quality in _qualities(accept_encoding).items() if quality > 0}
+
+
+def _qualities(accept_encoding):
+    """
+    Returns:
+        dict: Maps every content coding named by an Accept-Encoding header to its q-value, including q=0.
+    """
+    qualities = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding] = quality
+    return qualities
+
+
+def preferred_encoding(accept_encoding, available):
+    """
+    Picks the content coding to send a response in.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header of the request, or None.
+        available (iterable): The content codings the response is available in, in order of preference.
+
+    Returns:
+        str: The available coding with the highest q-value, the first of them on ties, or None if the client
+        accepts none of them. A coding the header does not name gets the q-value of "*", if any, while one it
+        names with q=0 is refused even if "*" is accepted.
+
+    Example:
+        >>> preferred_encoding("br;q=0.1, gzip", ["br", "gzip"])
+        'gzip'
+    """
+    qualities = _qualities(accept_encoding)
+    default = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def precompressed_variant(path, accept_encoding):
+    """
+    Picks the precompressed sibling of a file to serve for a request.
+
+    Args:
+        path (str): The path of the file being served.
+        accept_encoding (str): The Accept-Encoding header of the request, or None.
+
+    Returns:
+        tuple: The path of the sibling and its content coding, or None if the file should be served as is. Of the
+        siblings that exist, the one the client gives the highest q-value is picked, in the order of ENCODINGS
+        on ties.
+    """
+    available = {encoding: path + suffix for suffix, encoding in ENCODINGS.items() if os.path.isfile(path + suffix)}
+    encoding = preferred_encoding(accept_encoding, available)
+    if encoding is None:
+        return None
+    return available[encoding], encoding
+
+
+def _compress_file(path, suffix, stat):
+    """
+    Writes one compressed sibling of a file.
+
+    Returns:
+        int: The size of the sibling, or the size of the source if compressing it did not make it smaller.
+    """
+    with open(path, "rb") as source_file:
+        data = source_file.read()
+    if suffix == ".br":
+        compressed = brotli.compress(data, quality=11)
+    else:
+        # mtime=0 keeps the output identical for identical input
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    dest_path = path + suffix
+    if len(compressed) >= len(data):
+        _remove(dest_path)
+        return len(data)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as dest_file:
+            dest_file.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return len(compressed)
+
+
+def _remove(path):
+    """
+    Returns:
+        bool: True if the file existed and was removed.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
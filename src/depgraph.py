@@ -0,0 +1,135 @@
+import os
+
+
+class DependencyGraph:
+    """
+    Records which input files each page was rendered from.
+
+    Attributes:
+        inputs (dict): Maps each page source path to the sorted list of input paths it depends on, such as its
+            template, the partials included by the template and the static files it links to.
+        dependents (dict): Maps each input path to the set of page source paths that depend on it.
+        fingerprints (dict): Maps each input path to its [size, mtime_ns, hash] when it was last checked.
+
+    Both directions are kept, so the pages affected by a set of changed inputs are found in time proportional to
+    the number of affected pages, and the graph is stored in the build manifest between runs.
+    """
+    def __init__(self):
+        self.inputs = {}
+        self.dependents = {}
+        self.fingerprints = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Args:
+            data (dict): A dict created by `to_dict()`.
+
+        Returns:
+            DependencyGraph: The restored graph.
+        """
+        graph = cls()
+        graph.fingerprints = data.get("fingerprints", {})
+        for page, inputs in data.get("inputs", {}).items():
+            graph.set_inputs(page, inputs)
+        return graph
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The graph as JSON-serializable data.
+        """
+        return {"inputs": self.inputs, "fingerprints": self.fingerprints}
+
+    def set_inputs(self, page, inputs):
+        """
+        Replaces the inputs of a page.
+
+        Args:
+            page (str): The page source path.
+            inputs (iterable): The paths of the files the page was rendered from.
+        """
+        self.remove_page(page)
+        self.inputs[page] = sorted(set(inputs))
+        for path in self.inputs[page]:
+            self.dependents.setdefault(path, set()).add(page)
+            if path not in self.fingerprints:
+                self.fingerprints[path] = _fingerprint(path)
+
+    def remove_page(self, page):
+        """
+        Removes a page and forgets the inputs no other page depends on.
+
+        Args:
+            page (str): The page source path.
+        """
+        for path in self.inputs.pop(page, ()):
+            pages = self.dependents.get(path)
+            if pages is None:
+                continue
+            pages.discard(page)
+            if not pages:
+                del self.dependents[path]
+                self.fingerprints.pop(path, None)
+
+    def affected(self, paths):
+        """
+        Finds the pages that depend on any of the given inputs.
+
+        Args:
+            paths (iterable): Input paths.
+
+        Returns:
+            set: The source paths of the affected pages.
+        """
+        pages = set()
+        for path in paths:
+            pages.update(self.dependents.get(path, ()))
+        return pages
+
+    def changed_inputs(self, paths=None):
+        """
+        Finds the inputs that changed since they were last fingerprinted, and updates their fingerprints.
+
+        Args:
+            paths (iterable, optional): The inputs to check, for callers that already know which files changed.
+                Paths that are not inputs of any page are ignored. Defaults to every input.
+
+        Returns:
+            set: The paths of the inputs whose contents changed or that no longer exist.
+
+        An input whose size and modification time are unchanged is not read again.
+        """
+        if paths is None:
+            paths = list(self.fingerprints)
+        changed = set()
+        for path in paths:
+            if path not in self.fingerprints:
+                continue
+            fingerprint = self.fingerprints[path]
+            current = _fingerprint(path, fingerprint)
+            if current is None or current[2] != (fingerprint and fingerprint[2]):
+                changed.add(path)
+            self.fingerprints[path] = current
+        return changed
+
+
+def _fingerprint(path, previous=None):
+    """
+    Args:
+        path (str): The path of an input file.
+        previous (list, optional): The previous fingerprint, whose hash is reused if the size and modification time
+            did not change. Defaults to None.
+
+    Returns:
+        list: The size, modification time and content hash of the file, or None if it does not exist.
+    """
+    # Imported here because the manifest module imports this one
+    from manifest import hash_file
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+        return previous
+    return [stat.st_size, stat.st_mtime_ns, hash_file(path)]
@@ -0,0 +1,118 @@
+import json
+import os
+import re
+from log import get_logger
+from manifest import hash_file
+
+logger = get_logger(__name__)
+
+# Written to the root of every generation; never served
+ETAGS_FILE = ".etags.json"
+
+# File names carrying a content hash, such as "app.3f2a9c1b.css" or "logo-3f2a9c1b5d.png". The hash needs at least
+# one letter, so date stamps such as "changelog-20240115.html" are not taken for one
+FINGERPRINT_PATTERN = re.compile(r"[.-](?=[0-9]*[a-f])[0-9a-f]{8,}\.[^/]+$")
+
+# Generated pages keep their URL from one build to the next, so they are never immutable whatever their name
+PAGE_SUFFIXES = (".html", ".htm")
+
+# Fingerprinted files never change, everything else is revalidated with its ETag on every use
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def write_etags(output_dir, paths=None):
+    """
+    Records the content hash of every file of a build, for the server to send as its ETag.
+
+    Args:
+        output_dir (str): The output directory of the build.
+        paths (iterable, optional): The paths to update, relative to output_dir, for callers that know which files
+            changed, such as the watch mode. The entries of the other files are kept from the previous ETAGS_FILE
+            and the entries of paths that no longer exist are removed. Defaults to every file in output_dir.
+
+    Returns:
+        dict: The number of files that were "hashed" and whose hash was "reused".
+
+    The hashes are stored in ETAGS_FILE at the root of the build, each with the size and modification time of
+    its file. A file whose size and modification time match the previous entry keeps its hash without being read,
+    so after an incremental build only the files it wrote are hashed. Given the changed paths, only those are
+    even looked at, so a rebuild does not walk the whole build.
+    """
+    path = os.path.join(output_dir, ETAGS_FILE)
+    previous = _load(path)
+    counts = {"hashed": 0, "reused": 0}
+    if paths is None:
+        entries = {}
+        paths = []
+        for dirpath, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                paths.append(os.path.relpath(os.path.join(dirpath, filename), output_dir))
+    else:
+        entries = previous
+    for relative_path in paths:
+        file_path = os.path.join(output_dir, relative_path)
+        relative_path = relative_path.replace(os.sep, "/")
+        if relative_path == ETAGS_FILE or relative_path.endswith(".tmp"):
+            continue
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            entries.pop(relative_path, None)
+            continue
+        entry = previous.get(relative_path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            counts["reused"] += 1
+        else:
+            entry = [stat.st_size, stat.st_mtime_ns, hash_file(file_path)]
+            counts["hashed"] += 1
+        entries[relative_path] = entry
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as etags_file:
+        json.dump(entries, etags_file, sort_keys=True)
+    os.replace(tmp_path, path)
+    logger.info("%d files hashed for ETags, %d unchanged", counts["hashed"], counts["reused"], extra=counts)
+    return counts
+
+
+def load_etags(output_dir):
+    """
+    Loads the ETags recorded by `write_etags()`.
+
+    Args:
+        output_dir (str): The output directory of the build.
+
+    Returns:
+        dict: Maps the path of every file, relative to output_dir with "/" separators, to its quoted strong ETag.
+        Empty if the build has no ETAGS_FILE.
+    """
+    return {
+        relative_path: f'"{entry[2][:32]}"'
+        for relative_path, entry in _load(os.path.join(output_dir, ETAGS_FILE)).items()
+    }
+
+
+def cache_control(path):
+    """
+    Args:
+        path (str): The path of a served file.
+
+    Returns:
+        str: The Cache-Control header for the file: immutable for fingerprinted files other than pages and
+        revalidation for the rest.
+
+    Example:
+        >>> cache_control("/assets/app.3f2a9c1b.css")
+        'public, max-age=31536000, immutable'
+    """
+    if FINGERPRINT_PATTERN.search(path) and not path.lower().endswith(PAGE_SUFFIXES):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as etags_file:
+            return json.load(etags_file)
+    except (OSError, ValueError):
+        return {}
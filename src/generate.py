@@ -1,7 +1,17 @@
+import contextlib
+import mmap
 import os
 import re
-from markdown_blocks import markdown_to_html_node
+from concurrent.futures import ProcessPoolExecutor
+import markdown_blocks
+from markdown_blocks import blocks_to_html_node, iter_buffer_blocks, markdown_to_html_node
 from pathlib import Path
+from inline_markdown import LINK_PATTERN
+from log import capture_logs, get_logger, replay_logs
+from profiler import BuildProfile, NullProfile
+from template import load_template
+
+logger = get_logger(__name__)
 # Define directories for static and public files
 dir_static = "./static"
 dir_public = "./public"
@@ -11,6 +21,20 @@ FROM_PATH = "./content/index.md"
 TEMPLATE_PATH = 'template.html'
 DEST_PATH = "public/index.html"
 CONTENT_DIR = "./content"
+
+# Matches the title of a page: the first line starting with "# "
+TITLE_PATTERN = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+# Lines of encoded markdown starting with "#", the only lines TITLE_PATTERN can match from, after any line ending
+HEADING_LINE_PATTERN = re.compile(rb"(?<![^\r\n])#")
+
+# The line endings translated to "\n" when a file is read in text mode
+LINE_END_PATTERN = re.compile(rb"\r\n|\r|\n")
+
+# Markdown files at least this large are memory-mapped and streamed block by block instead of being read into
+# memory at once
+STREAM_THRESHOLD = 32 << 20
+
 # Function to extract the title from markdown content
 def extract_title(markdown):
     """
@@ -31,15 +55,63 @@ def extract_title(markdown):
         >>> extract_title("# My Title")
         'My Title'
     """
-    header_pattern = r"^#\s+(.+)$"  # Regular expression to match the markdown title
-    match = re.search(header_pattern, markdown, re.MULTILINE)
+    match = TITLE_PATTERN.search(markdown)
     if match:
         title = match.group().lstrip('# ')
-        print(f"Extracted title: {title}")
+        logger.debug("Extracted title: %s", title)
         return title
     else:
         raise ValueError("Markdown content does not contain a title.")
 
+def extract_title_from_buffer(buffer, encoding="utf-8"):
+    """
+    Extracts the title from encoded markdown held in a buffer, such as a memory-mapped file.
+
+    Args:
+        buffer (bytes-like): The encoded markdown, such as bytes or an mmap.
+        encoding (str, optional): The encoding of the markdown. Defaults to "utf-8".
+
+    Returns:
+        str: The extracted title, the same as `extract_title()` returns for the decoded text.
+
+    Raises:
+        ValueError: If the markdown content does not contain a title.
+
+    The lines starting with "#" are found by searching the raw bytes, and only those lines are decoded and
+    matched with TITLE_PATTERN, so finding a title near the top of a large file only decodes a few bytes of it.
+    TITLE_PATTERN can only match across lines when a line holds nothing but "#" and whitespace, so such a line is
+    matched together with the blank lines after it and the next line. Lines may end with "\r\n" or "\r" as well as "\n", which are translated to "\n" as reading the
+    file in text mode does, so the title never ends with a stray "\r".
+
+    Example:
+        >>> extract_title_from_buffer(b"Intro\n# My Title\nMore text")
+        'My Title'
+    """
+    for candidate in HEADING_LINE_PATTERN.finditer(buffer):
+        match = TITLE_PATTERN.search("".join(_candidate_lines(buffer, candidate.start(), encoding)))
+        if match:
+            return extract_title(match.group())
+    raise ValueError("Markdown content does not contain a title.")
+
+
+def _candidate_lines(buffer, start, encoding):
+    """
+    Decodes the line of a buffer starting at `start` and, if it holds nothing but "#" and whitespace, the blank
+    lines after it and the next line, which TITLE_PATTERN can match across.
+    """
+    first = True
+    while start < len(buffer):
+        line_end = LINE_END_PATTERN.search(buffer, start)
+        end = len(buffer) if line_end is None else line_end.end()
+        line = buffer[start:end].decode(encoding)
+        if line_end is not None:
+            line = line.rstrip("\r\n") + "\n"
+        yield line
+        if (line[1:] if first else line).strip():
+            return
+        first = False
+        start = end
+
 # Function to generate the HTML page from markdown and template
 # Recursive function to generate HTML pages from markdown files and traverse directories
 def generate_and_traverse(src_dir, dest_dir, template_path):
@@ -56,16 +128,11 @@ def generate_and_traverse(src_dir, dest_dir, template_path):
 
     This function traverses the source directory and its subdirectories using `os.walk()`. For each markdown file found, it generates an HTML page by reading the markdown content, reading the template file, converting the markdown to HTML, extracting the title from the markdown content, replacing placeholders in the template with the title and HTML content, and writing the output HTML to the destination directory.
 
-    If any error occurs during the process, it is printed to the console and the function continues to the next file.
+    If any error occurs during the process, it is logged as an error and the function continues to the next file.
 
     Example:
         >>> generate_and_traverse("./content", "./public", "template.html")
-        ================================================================================
-        Generating page from ./content/index.md to ./public/index.html using template.html
-        ================================================================================
-        ================================================================================
-        PAGE GENERATED SUCCESSFULLY
-        ================================================================================
+        # Logs "Generated ./public/index.html from ./content/index.md" at the "verbose" log level.
     """
     for root, _, files in os.walk(src_dir):
         for file in files:
@@ -74,63 +141,84 @@ def generate_and_traverse(src_dir, dest_dir, template_path):
                 relative_path = os.path.relpath(markdown_path, src_dir)
                 dest_path = os.path.join(dest_dir, os.path.splitext(relative_path)[0] + ".html")
 
-                print("=" * 94)
-                print(f"Generating page from {markdown_path} to {dest_path} using {template_path}")
-                print("=" * 94)
-
                 # Read the markdown file content
                 try:
                     with open(markdown_path, encoding="utf-8") as source_file:
                         markdown_content = source_file.read()
                 except Exception as e:
-                    print(f"Error: Unable to read file '{markdown_path}'. {e}")
+                    logger.error("Unable to read file '%s'. %s", markdown_path, e, extra={"page": markdown_path})
                     continue
 
-                # Read the template file content
+                # Load the compiled template
                 try:
-                    with open(template_path, encoding="utf-8") as template_file:
-                        template = template_file.read()
+                    template = load_template(template_path)
                 except Exception as e:
-                    print(f"Error: Unable to read file '{template_path}'. {e}")
+                    logger.error("Unable to read file '%s'. %s", template_path, e, extra={"page": markdown_path})
                     continue
 
-                # Convert markdown to HTML
+                # Convert markdown to an HTML node tree
                 try:
-                    html_content = markdown_to_html_node(markdown_content).to_html()
+                    html_node = markdown_to_html_node(markdown_content)
                 except Exception as e:
-                    print(f"Error: Unable to convert markdown in file '{markdown_path}' to HTML. {e}")
+                    logger.error(
+                        "Unable to convert markdown in file '%s' to HTML. %s", markdown_path, e, extra={"page": markdown_path}
+                    )
                     continue
 
                 # Extract the title from the markdown content
                 try:
                     title = extract_title(markdown_content)
                 except ValueError as e:
-                    print(f"Error: {e}")
+                    logger.error("%s: %s", markdown_path, e, extra={"page": markdown_path})
                     continue
 
-                # Replace placeholders in the template with title and HTML content
+                # Fill in the template placeholders and stream the output HTML to the destination path
                 try:
-                    template = template.replace("{{ Title }}", title)
-                    template = template.replace("{{ Content }}", html_content)
-                except Exception as e:
-                    print(f"Error: Unable to replace placeholders in template '{template_path}'. {e}")
+                    write_page(dest_path, template, {"Title": title, "Content": html_node})
+                except ValueError as e:
+                    logger.error(
+                        "Unable to convert markdown in file '%s' to HTML. %s", markdown_path, e, extra={"page": markdown_path}
+                    )
                     continue
-
-                # Write the output HTML to the destination path
-                try:
-                    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                    with open(dest_path, "w", encoding="utf-8") as dest_file:
-                        dest_file.write(template)
                 except Exception as e:
-                    print(f"Error: Unable to write file '{dest_path}'. {e}")
+                    logger.error("Unable to write file '%s'. %s", dest_path, e, extra={"page": markdown_path})
                     continue
 
-                print("=" * 94)
-                print("PAGE GENERATED SUCCESSFULLY")
-                print("=" * 94)
+                logger.debug("Generated %s from %s", dest_path, markdown_path, extra={"page": markdown_path})
+
+def write_page(dest_path, template, context):
+    """
+    Streams a page to its destination without building the full HTML string in memory.
+
+    Args:
+        dest_path (str): The path to the destination file.
+        template (Template): The compiled page template.
+        context (dict): The placeholder values, such as the page title and the node tree of the content.
+
+    The page is written to a temporary file next to the destination which then replaces the
+    destination, so a failed write never leaves a truncated page behind.
+    """
+    _write_atomic(dest_path, lambda dest_file: template.write(dest_file, context))
+
+
+def _write_atomic(dest_path, write):
+    """
+    Calls `write` with a temporary file next to the destination, then renames it over the destination.
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as dest_file:
+            write(dest_file)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
 
 # Function to generate the HTML page from markdown and template
-def generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH):
+def generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH, cache=None, dependencies=None, static_dir=None, profile=None):
     """
     Generates an HTML page from a markdown file and a template file, and writes it to a destination path.
 
@@ -138,75 +226,188 @@ def generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH):
         FROM_PATH (str): The path to the markdown file.
         TEMPLATE_PATH (str): The path to the template file.
         DEST_PATH (str): The path to the destination file.
+        cache (RenderCache, optional): A cache of HTML rendered for earlier markdown. On a hit the markdown is not parsed again. Defaults to None.
+        dependencies (set, optional): When given, the paths of the other files the page is rendered from are added to it: the template, its partials and the files in static_dir that the markdown links to. Defaults to None.
+        static_dir (str, optional): The directory static files are served from, used to find the files the markdown links to. Defaults to None.
+        profile (BuildProfile, optional): When given, the time and net live memory blocks of every stage of the page are recorded in it. The page is then serialized, filled into the template and written in separate steps instead of being streamed, so that each of them can be measured. Defaults to None.
 
     Returns:
-        None
+        bool: True if the page was generated, False if an error occurred.
 
-    This function reads the content of the markdown file, reads the content of the template file, converts the markdown to HTML, extracts the title from the markdown content, replaces placeholders in the template with the title and HTML content, and writes the output HTML to the destination file. If any error occurs during the process, an error message is printed to the console.
+    This function reads the content of the markdown file, reads the content of the template file, converts the markdown to HTML, extracts the title from the markdown content, replaces placeholders in the template with the title and HTML content, and writes the output HTML to the destination file. If any error occurs during the process, an error message is logged. A successful page is only logged at the "verbose" level, see `log.configure_logging()`.
 
     Example:
         >>> generate_page("./content/index.md", "template.html", "public/index.html")
-        ================================================================================
-        Generating page from ./content/index.md to public/index.html using template.html
-        ================================================================================
-        ================================================================================
-        PAGE GENERATED SUCCESSFULLY
-        ================================================================================
-    """
-    print("=" * 94)
-    print(f"Generating page from {FROM_PATH} to {DEST_PATH} using {TEMPLATE_PATH}")
-    print("=" * 94)
-
-    # Read the markdown file content
+        True
+    """
+    if profile is None:
+        return _generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH, cache, dependencies, static_dir, NullProfile())
+    with profile.page(FROM_PATH):
+        return _generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH, cache, dependencies, static_dir, profile)
+
+
+def _generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH, cache, dependencies, static_dir, profile):
+    """
+    Generates a page as described in `generate_page()`, measuring each stage with `profile`.
+    """
+    # Read the markdown file content, unless it is large enough to be streamed
     try:
-        with open(FROM_PATH, encoding="utf-8") as source_file:
-            markdown_content = source_file.read()
+        with profile.stage("read"):
+            streamed = os.path.getsize(FROM_PATH) >= STREAM_THRESHOLD
+            if not streamed:
+                with open(FROM_PATH, encoding="utf-8") as source_file:
+                    markdown_content = source_file.read()
     except Exception as e:
-        print(f"Error: Unable to read file '{FROM_PATH}'. {e}")
-        return
+        logger.error("Unable to read file '%s'. %s", FROM_PATH, e, extra={"page": FROM_PATH})
+        return False
 
-    # Read the template file content
+    # Load the compiled template
     try:
-        with open(TEMPLATE_PATH, encoding="utf-8") as template_file:
-            template = template_file.read()
+        with profile.stage("load_template"):
+            template = load_template(TEMPLATE_PATH)
     except Exception as e:
-        print(f"Error: Unable to read file '{TEMPLATE_PATH}'. {e}")
-        return
-
-    # Convert markdown to HTML
+        logger.error("Unable to read file '%s'. %s", TEMPLATE_PATH, e, extra={"page": FROM_PATH})
+        return False
+
+    # Record the template, its partials and the linked static files as inputs of the page
+    if dependencies is not None:
+        dependencies.update(template.dependencies)
+    if streamed:
+        return _generate_streamed_page(FROM_PATH, DEST_PATH, template, dependencies, static_dir, profile)
+    if dependencies is not None and static_dir is not None:
+        with profile.stage("find_linked_files"):
+            dependencies.update(find_linked_files(markdown_content, static_dir))
+
+    # Convert markdown to an HTML node tree, or reuse the HTML cached for the same markdown
     try:
-        html_content = markdown_to_html_node(markdown_content).to_html()
+        if cache is None:
+            html_node = _parse_markdown(markdown_content, profile)
+        else:
+            with profile.stage("render_cache"):
+                html_node = cache.get(markdown_content)
+            if html_node is None:
+                html_node = _parse_markdown(markdown_content, profile)
+                with profile.stage("to_html"):
+                    html_node = html_node.to_html()
+                with profile.stage("render_cache"):
+                    cache.put(markdown_content, html_node)
     except Exception as e:
-        print(f"Error: Unable to convert markdown in file '{FROM_PATH}' to HTML. {e}")
-        return
+        logger.error("Unable to convert markdown in file '%s' to HTML. %s", FROM_PATH, e, extra={"page": FROM_PATH})
+        return False
 
     # Extract the title from the markdown content
     try:
-        title = extract_title(markdown_content)
+        with profile.stage("extract_title"):
+            title = extract_title(markdown_content)
     except ValueError as e:
-        print(f"Error: {e}")
-        return
+        logger.error("%s: %s", FROM_PATH, e, extra={"page": FROM_PATH})
+        return False
 
-    # Replace placeholders in the template with title and HTML content
+    # Fill in the template placeholders and stream the output HTML to the destination path, or run each step
+    # separately so that it can be measured
     try:
-        template = template.replace("{{ Title }}", title)
-        template = template.replace("{{ Content }}", html_content)
+        if isinstance(profile, NullProfile):
+            write_page(DEST_PATH, template, {"Title": title, "Content": html_node})
+        else:
+            with profile.stage("to_html"):
+                content = html_node if isinstance(html_node, str) else html_node.to_html()
+            with profile.stage("template_fill"):
+                page = template.render({"Title": title, "Content": content})
+            with profile.stage("write"):
+                _write_atomic(DEST_PATH, lambda dest_file: dest_file.write(page))
+    except ValueError as e:
+        logger.error("Unable to convert markdown in file '%s' to HTML. %s", FROM_PATH, e, extra={"page": FROM_PATH})
+        return False
     except Exception as e:
-        print(f"Error: Unable to replace placeholders in template '{TEMPLATE_PATH}'. {e}")
-        return
+        logger.error("Unable to write file '%s'. %s", DEST_PATH, e, extra={"page": FROM_PATH})
+        return False
 
-    # Write the output HTML to the destination path
-    try:
-        os.makedirs(os.path.dirname(DEST_PATH), exist_ok=True)
-        with open(DEST_PATH, "w", encoding="utf-8") as dest_file:
-            dest_file.write(template)
-    except Exception as e:
-        print(f"Error: Unable to write file '{DEST_PATH}'. {e}")
-        return
+    logger.debug("Generated %s from %s", DEST_PATH, FROM_PATH, extra={"page": FROM_PATH})
+    return True
 
-    print("=" * 94)
-    print("PAGE GENERATED SUCCESSFULLY")
-    print("=" * 94)
+
+def _generate_streamed_page(FROM_PATH, DEST_PATH, template, dependencies, static_dir, profile):
+    """
+    Generates a page from a markdown file of at least STREAM_THRESHOLD bytes without reading it into memory.
+
+    The file is memory-mapped, so its bytes are read straight from the page cache instead of being copied into
+    a Python string. The title is found by scanning the mapped bytes for headings, then the blocks are found by
+    scanning them for b"\n\n", and each block is decoded, parsed and written to the destination before the next
+    one, with the static files it links to recorded on the way. Streamed pages bypass the render cache, which is
+    keyed by the whole markdown.
+
+    Returns:
+        bool: True if the page was generated, False if an error occurred.
+    """
+    with contextlib.ExitStack() as stack:
+        try:
+            source_file = stack.enter_context(open(FROM_PATH, "rb"))
+            buffer = stack.enter_context(mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ))
+        except Exception as e:
+            logger.error("Unable to read file '%s'. %s", FROM_PATH, e, extra={"page": FROM_PATH})
+            return False
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+        try:
+            with profile.stage("extract_title"):
+                title = extract_title_from_buffer(buffer)
+        except UnicodeDecodeError as e:
+            logger.error("Unable to read file '%s'. %s", FROM_PATH, e, extra={"page": FROM_PATH})
+            return False
+        except ValueError as e:
+            logger.error("%s: %s", FROM_PATH, e, extra={"page": FROM_PATH})
+            return False
+
+        try:
+            with _measure_parser(profile, "stream"):
+                blocks = iter_buffer_blocks(buffer)
+                if dependencies is not None and static_dir is not None:
+                    blocks = _record_linked_files(blocks, static_dir, dependencies)
+                write_page(DEST_PATH, template, {"Title": title, "Content": blocks_to_html_node(blocks)})
+        except ValueError as e:
+            logger.error(
+                "Unable to convert markdown in file '%s' to HTML. %s", FROM_PATH, e, extra={"page": FROM_PATH}
+            )
+            return False
+        except Exception as e:
+            logger.error("Unable to write file '%s'. %s", DEST_PATH, e, extra={"page": FROM_PATH})
+            return False
+
+    logger.debug("Generated %s from %s", DEST_PATH, FROM_PATH, extra={"page": FROM_PATH, "streamed": True})
+    return True
+
+
+def _record_linked_files(blocks, static_dir, dependencies):
+    """
+    Passes blocks through, adding the static files each of them links to to `dependencies`. Links never span
+    lines, so this finds the same files as `find_linked_files()` does for the whole text.
+    """
+    for block in blocks:
+        if "](" in block:
+            dependencies.update(find_linked_files(block, static_dir))
+        yield block
+
+
+def _parse_markdown(markdown, profile):
+    """
+    Converts markdown to an HTML node tree with `markdown_to_html_node()`, measuring the block splitting, the
+    block parsing and the inline parsing nested in it as separate stages.
+    """
+    with _measure_parser(profile, "parse"):
+        return markdown_to_html_node(markdown)
+
+
+@contextlib.contextmanager
+def _measure_parser(profile, stage):
+    """
+    Measures the code run in the with block as `stage`, with the parser functions it calls as nested stages.
+    """
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(profile.stage(stage))
+        for name in ("markdown_to_blocks", "block_to_html_node", "text_to_textnodes"):
+            stack.enter_context(profile.instrument(markdown_blocks, name))
+        yield
 
 
 def traverse_and_generate(src_dir, dest_dir, template_path):
@@ -227,7 +428,7 @@ def traverse_and_generate(src_dir, dest_dir, template_path):
 
     The `generate_page()` function is called with the markdown file path, template path, and destination path to generate the HTML page.
 
-    If any error occurs during the process, it is printed to the console and the function continues to the next file.
+    If any error occurs during the process, it is logged as an error and the function continues to the next file.
 
     Example:
         >>> traverse_and_generate("./content", "./public", "template.html")
@@ -241,7 +442,7 @@ def traverse_and_generate(src_dir, dest_dir, template_path):
                 dest_path = os.path.join(dest_dir, os.path.splitext(relative_path)[0] + ".html")
                 generate_page(markdown_path, template_path, dest_path)
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, cache=None, static_dir=None, profile=None):
     """
     Generate HTML pages recursively from markdown files in the given directory and copy them to the destination directory using the specified template.
 
@@ -249,6 +450,11 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
         dir_path_content (str): The path to the directory containing the markdown files.
         template_path (str): The path to the template file.
         dest_dir_path (str): The path to the destination directory where the generated HTML pages will be copied.
+        manifest (Manifest, optional): The manifest of the previous build. When given, pages whose markdown and other inputs are unchanged are skipped, outputs of deleted sources are removed and the manifest is updated to describe this build. Defaults to None.
+        jobs (int, optional): The number of worker processes used to render pages. Defaults to 1.
+        cache (RenderCache, optional): A cache of rendered HTML shared by all pages and workers. Defaults to None.
+        static_dir (str, optional): The directory static files are served from. Static files linked from a page are recorded as inputs of the page. Defaults to None.
+        profile (BuildProfile, optional): Records the time and net live memory blocks of every stage of every page, see `generate_page()`. Defaults to None.
 
     Returns:
         None
@@ -256,17 +462,157 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
     Raises:
         None
 
-    This function iterates over the files in the given directory and its subdirectories. For each file, it checks if it is a markdown file. If it is, it generates an HTML page from the markdown file using the specified template and copies it to the destination directory. If the file is not a markdown file, it recursively calls itself with the file path as the directory path and the same template and destination paths.
+    This function collects the files in the given directory and its subdirectories with `find_pages()`. The pages that need to be generated are then rendered with `render_pages()`, which converts each markdown file to HTML using the specified template and writes it to the destination directory.
+
+    With a manifest, the inputs of every page other than its markdown (the template, its partials and the linked static files) are kept in the manifest's dependency graph. The inputs that changed since the previous build are looked up in the graph, and exactly the pages depending on them are regenerated along with the pages whose markdown changed.
 
     Example:
         >>> generate_pages_recursive("./content", "template.html", "./public")
         # Generates HTML pages from markdown files in the "./content" directory and copies them to the "./public" directory using the "template.html" template.
     """
-    for filename in os.listdir(dir_path_content):
+    pages = find_pages(dir_path_content, dest_dir_path)
+    if manifest is None:
+        render_pages(pages, template_path, jobs, cache, static_dir, profile)
+        return
+
+    graph = manifest.graph
+    affected = graph.affected(graph.changed_inputs())
+    template_path = os.path.normpath(template_path)
+    stale = []
+    sources = []
+    for from_path, dest_path in pages:
+        source_hash, stat = manifest.source_hash(from_path)
+        relative_path = os.path.relpath(dest_path, dest_dir_path)
+        if (
+            not manifest.is_fresh(from_path, relative_path, source_hash)
+            or from_path in affected
+            or template_path not in graph.inputs.get(from_path, ())
+            or not os.path.exists(dest_path)
+        ):
+            stale.append((from_path, dest_path))
+            sources.append((relative_path, source_hash, stat))
+    results = render_pages(stale, template_path, jobs, cache, static_dir, profile)
+    for (from_path, _), (relative_path, source_hash, stat), inputs in zip(stale, sources, results):
+        if inputs is not None:
+            manifest.record(from_path, relative_path, source_hash, stat)
+            graph.set_inputs(from_path, inputs)
+        else:
+            manifest.forget(from_path)
+    for dest_path in manifest.prune(dest_dir_path):
+        logger.debug("Removed stale page %s", dest_path)
+    generated = sum(inputs is not None for inputs in results)
+    logger.info(
+        "%d of %d pages generated, %d unchanged", generated, len(pages), len(pages) - len(stale),
+        extra={"generated": generated, "pages": len(pages), "unchanged": len(pages) - len(stale)},
+    )
+
+
+def render_pages(pages, template_path, jobs=1, cache=None, static_dir=None, profile=None):
+    """
+    Generates a list of pages, optionally spreading the work over a pool of worker processes.
+
+    Args:
+        pages (list): A list of (source path, destination path) tuples.
+        template_path (str): The path to the template file.
+        jobs (int, optional): The number of worker processes. With 1 the pages are generated in this process. Defaults to 1.
+        cache (RenderCache, optional): A cache of rendered HTML. Defaults to None.
+        static_dir (str, optional): The directory static files are served from. Defaults to None.
+        profile (BuildProfile, optional): Records the stages of every page. Workers measure their pages in a profile of their own, which is merged into this one. Defaults to None.
+
+    Returns:
+        list: For each page, in order, the set of paths the page was rendered from besides its markdown, as collected by `generate_page()`, or None if an error occurred.
+
+    Each worker captures the records logged by `generate_page()`, and they are logged in page order once the page is done, so the log of a parallel build reads exactly like the log of a serial one. The pages that failed are listed at the end.
+    """
+    results = []
+    if jobs <= 1 or len(pages) <= 1:
+        for from_path, dest_path in pages:
+            dependencies = set()
+            generated = generate_page(from_path, template_path, dest_path, cache, dependencies, static_dir, profile)
+            results.append(dependencies if generated else None)
+    else:
+        profiled = profile is not None
+        level = logger.getEffectiveLevel()
+        tasks = [
+            (from_path, template_path, dest_path, cache, static_dir, profiled, level) for from_path, dest_path in pages
+        ]
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for dependencies, records, measured in executor.map(_generate_page_captured, tasks, chunksize=chunksize):
+                replay_logs(records)
+                results.append(dependencies)
+                if measured is not None:
+                    profile.merge(measured)
+    failed = [from_path for (from_path, _), dependencies in zip(pages, results) if dependencies is None]
+    if failed:
+        logger.error("Failed to generate %d page(s): %s", len(failed), ", ".join(failed), extra={"failed": failed})
+    return results
+
+
+def _generate_page_captured(task):
+    """
+    Runs `generate_page()` in a worker process, capturing what it logs.
+
+    Args:
+        task (tuple): The source path, template path, destination path, render cache and static directory of the page, whether to profile it and the log level of the build.
+
+    Returns:
+        tuple: The set of paths the page was rendered from, or None if it was not generated, the captured log records and the measurements of the page (see `BuildProfile.to_dict()`), or None if it was not profiled.
+    """
+    from_path, template_path, dest_path, cache, static_dir, profiled, level = task
+    profile = BuildProfile() if profiled else None
+    dependencies = set()
+    with capture_logs(level) as records:
+        generated = generate_page(from_path, template_path, dest_path, cache, dependencies, static_dir, profile)
+    return (dependencies if generated else None), records, profile and profile.to_dict()
+
+
+def find_linked_files(markdown, static_dir):
+    """
+    Finds the static files that the links and images of a markdown string point to.
+
+    Args:
+        markdown (str): The markdown string.
+        static_dir (str): The directory static files are served from.
+
+    Returns:
+        set: The paths of the existing files in static_dir that are linked by a root-relative URL such as "/images/logo.png". External and page-relative links are ignored.
+
+    Example:
+        >>> find_linked_files("![logo](/images/logo.png) [home](/)", "./static")
+        {'static/images/logo.png'}
+    """
+    linked = set()
+    for _, url in LINK_PATTERN.findall(markdown):
+        if not url.startswith("/") or url.startswith("//"):
+            continue
+        path = os.path.normpath(os.path.join(static_dir, url.split("#")[0].split("?")[0].lstrip("/")))
+        if os.path.isfile(path):
+            linked.add(path)
+    return linked
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    """
+    Recursively collects the source files in a content directory together with their output paths.
+
+    Args:
+        dir_path_content (str): The path to the directory containing the markdown files.
+        dest_dir_path (str): The path to the destination directory.
+
+    Returns:
+        list: A list of (source path, destination path) tuples, sorted by source path.
+
+    Example:
+        >>> find_pages("./content", "./public")
+        [('./content/index.md', PosixPath('public/index.html')), ('./content/majesty/index.md', PosixPath('public/majesty/index.html'))]
+    """
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path)
+            pages.append((from_path, Path(dest_path).with_suffix(".html")))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path)
\ No newline at end of file
+            pages.extend(find_pages(from_path, dest_path))
+    return pages
@@ -7,7 +7,11 @@ class HTMLNode:
         value (str): The value or content of the node.
         children (list): A list of child nodes.
         props (dict): A dictionary of HTML attributes and their values.
+
+    Nodes use __slots__ instead of an instance __dict__, since large documents create hundreds of thousands of them.
     """
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -23,6 +27,34 @@ class HTMLNode:
         """
         raise NotImplementedError
 
+    def write_html(self, sink):
+        """
+        Write the HTML of the node to a file-like object, one fragment at a time.
+
+        Args:
+            sink: Any object with a `write(str)` method, such as an open file or an io.StringIO.
+        """
+        self._write_html(sink.write)
+
+    def iter_html(self):
+        """
+        Generate the HTML of the node as a sequence of string fragments.
+
+        Yields:
+            str: Consecutive fragments of the HTML string.
+        """
+        yield self.to_html()
+
+    def _write_html(self, write):
+        """
+        Pass the HTML of the node to `write` in fragments. Subclasses that only implement
+        `to_html` are written as a single fragment.
+
+        Args:
+            write (callable): Called with each fragment, e.g. `list.append` or `file.write`.
+        """
+        write(self.to_html())
+
     def props_to_html(self):
         """
         Convert the props dictionary to an HTML attribute string.
@@ -54,6 +86,8 @@ class LeafNode(HTMLNode):
         value (str): The value or content of the node.
         props (dict): A dictionary of HTML attributes and their values.
     """
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         if value is None:
             raise ValueError("Leaf nodes require a value.")
@@ -97,25 +131,78 @@ class ParentNode(HTMLNode):
         children (list): A list of child nodes.
         props (dict): A dictionary of HTML attributes and their values.
     """
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
-        self.tag = tag
-        self.children = children
-        self.props = props
+        super().__init__(tag, None, children, props)
 
     def to_html(self):
+        """
+        Convert the parent node and all of its descendants to an HTML string.
+
+        Returns:
+            str: The HTML string representation of the node.
+
+        Raises:
+            ValueError: If the node or one of its descendants has no tag or children.
+
+        The fragments of the whole tree are collected into a single list and joined once, so
+        serialization is linear in the size of the output.
+        """
+        parts = []
+        self._write_html(parts.append)
+        return "".join(parts)
+
+    def iter_html(self):
+        """
+        Generate the HTML of the parent node and all of its descendants as a sequence of string fragments.
+
+        Yields:
+            str: The opening tag, the fragments of each child in order, then the closing tag.
+
+        Raises:
+            ValueError: If the node or one of its descendants has no tag or children.
+
+        Nothing is joined, so a large page can be streamed to a file or socket without building the
+        whole HTML string in memory.
+        """
+        yield self._open_tag()
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
+
+    def _write_html(self, write):
+        """
+        Pass the HTML of the node and its descendants to `write` in fragments.
+
+        Args:
+            write (callable): Called with each fragment, e.g. `list.append` or `file.write`.
+        """
+        write(self._open_tag())
+        for child in self.children:
+            child._write_html(write)
+        write(f"</{self.tag}>")
+
+    def _open_tag(self):
+        """
+        Build the opening tag of the node with its props.
+
+        Returns:
+            str: The opening tag, e.g. '<a href="/">'.
+
+        Raises:
+            ValueError: If the node has no tag or children.
+        """
         if self.tag is None:
             raise ValueError("Parent nodes require a tag.")
         if self.children is None:
             raise ValueError("Parent nodes require children.")
-        children = ""
-        for child in self.children:
-            children += child.to_html()
         if self.props is None:
-            return f"<{self.tag}>{children}</{self.tag}>"
+            return f"<{self.tag}>"
         props_html = ""
         for props in self.props:
             props_html += f' {props}="{self.props[props]}"'
-        return f"<{self.tag}{props_html}>{children}</{self.tag}>"
+        return f"<{self.tag}{props_html}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -10,6 +10,16 @@ from textnode import (
     text_type_image,
 )
 
+# Inline delimiters, longest first so that "**" is matched before "*"
+DELIMITER_PATTERN = re.compile(r"\*\*|\*|`")
+DELIMITER_TEXT_TYPES = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
+
 def text_to_textnodes(text):
     """
     Convert a given text into a list of TextNode objects representing the text with different formatting.
@@ -19,16 +29,74 @@ def text_to_textnodes(text):
         
     Returns:
         list: A list of TextNode objects representing the text with different formatting.
+
+    Raises:
+        ValueError: If a "**", "*" or "`" delimiter is not closed.
         
-    This function takes a given text as input and converts it into a list of TextNode objects. It first creates a single TextNode object with the input text and the text_type_text. Then, it applies different formatting delimiters such as "**" (bold), "*" (italic), and "`" (code) to the text by calling the split_nodes_delimiter function. It also splits the text into image and link nodes by calling the split_nodes_image and split_nodes_link functions respectively. Finally, it returns the list of TextNode objects representing the text with different formatting.
+    This function scans the text once from left to right. At each "**" (bold), "*" (italic) or "`" (code) delimiter it looks for the matching closing delimiter and emits the enclosed text as a single TextNode; the text between formatted sections is split into image and link nodes. The result is the same list of TextNode objects that applying split_nodes_delimiter for each delimiter followed by split_nodes_image and split_nodes_link would produce, without rebuilding the node list once per pass. Unlike those passes, the content of a code span is never split on "*".
+    """
+    nodes = []
+    position = 0
+    while True:
+        match = DELIMITER_PATTERN.search(text, position)
+        if match is None:
+            _append_inline_text(nodes, text, position, len(text))
+            return nodes
+        delimiter = match.group()
+        end = text.find(delimiter, match.end())
+        # A single "*" cannot be closed by the start of a "**" delimiter
+        if end == -1 or (delimiter == "*" and text.startswith("**", end)):
+            raise ValueError("Invalid markdown, formatted section not closed")
+        _append_inline_text(nodes, text, position, match.start())
+        if end > match.end():
+            nodes.append(TextNode(text[match.end():end], DELIMITER_TEXT_TYPES[delimiter]))
+        position = end + len(delimiter)
+
+def _append_inline_text(nodes, text, start, end):
+    """
+    Append the nodes for an unformatted section of text, splitting out images and links.
+
+    Args:
+        nodes (list): The list of TextNode objects to append to.
+        text (str): The full text being converted.
+        start (int): The index where the section starts.
+        end (int): The index where the section ends.
+    """
+    position = start
+    for match in IMAGE_PATTERN.finditer(text, start, end):
+        _append_matches(nodes, text, position, match.start(), LINK_PATTERN, text_type_link)
+        nodes.append(TextNode(match.group(1), text_type_image, match.group(2)))
+        position = match.end()
+    _append_matches(nodes, text, position, end, LINK_PATTERN, text_type_link)
+
+def _append_matches(nodes, text, start, end, pattern, text_type):
+    """
+    Append the nodes for a section of text in which every match of `pattern` becomes a node of `text_type`.
+
+    Args:
+        nodes (list): The list of TextNode objects to append to.
+        text (str): The full text being converted.
+        start (int): The index where the section starts.
+        end (int): The index where the section ends.
+        pattern (re.Pattern): IMAGE_PATTERN or LINK_PATTERN, capturing the text and the URL.
+        text_type (str): The text type of the matched nodes.
+
+    Returns:
+        int: The number of matches found.
+
+    The section is sliced once at the match boundaries, so the work is linear in its length however many matches it contains.
     """
-    nodes = [TextNode(text, text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    position = start
+    count = 0
+    for match in pattern.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], text_type_text))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+        count += 1
+    if end > position:
+        nodes.append(TextNode(text[position:end], text_type_text))
+    return count
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """
@@ -77,37 +145,18 @@ def split_nodes_image(old_nodes):
     Returns:
         list: A new list of TextNode objects representing the split text with image markdown.
 
-    Raises:
-        ValueError: If the image section in the markdown is not closed.
-
-    This function takes a list of TextNode objects representing the original text and splits it into a new list of TextNode objects based on image markdown. It iterates over each TextNode object in the old_nodes list and checks if its text_type is not equal to text_type_text. If it is not, the TextNode object is appended to the new_nodes list without modification. If it is, the text of the TextNode object is checked for image markdown. If no image markdown is found, the TextNode object is appended to the new_nodes list. If image markdown is found, the text is split into sections using the image markdown. If the number of sections after splitting is not equal to 2, indicating an invalid markdown format, a ValueError is raised. The function then iterates over the sections and creates new TextNode objects with the appropriate text and text_type. The new TextNode objects are appended to the new_nodes list. Finally, the new_nodes list is returned.
+    This function takes a list of TextNode objects representing the original text and splits it into a new list of TextNode objects based on image markdown. It iterates over each TextNode object in the old_nodes list and checks if its text_type is not equal to text_type_text. If it is not, the TextNode object is appended to the new_nodes list without modification. If it is, the spans of the image markdown in its text are found with a single `finditer` scan, and the text is sliced once at those spans into text nodes and image nodes, which are appended to the new_nodes list. Finally, the new_nodes list is returned.
     """
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != text_type_text:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
+        text = old_node.text
+        first = len(new_nodes)
+        if not _append_matches(new_nodes, text, 0, len(text), IMAGE_PATTERN, text_type_image):
+            del new_nodes[first:]
             new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    text_type_image,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
     return new_nodes
 
 def split_nodes_link(old_nodes):
@@ -120,31 +169,18 @@ def split_nodes_link(old_nodes):
     Returns:
         list: A new list of TextNode objects representing the split text with link markdown.
 
-    Raises:
-        ValueError: If the link section in the markdown is not closed.
-
-    This function takes a list of TextNode objects representing the original text and splits it into a new list of TextNode objects based on link markdown. It iterates over each TextNode object in the old_nodes list and checks if its text_type is not equal to text_type_text. If it is not, the TextNode object is appended to the new_nodes list without modification. If it is, the text of the TextNode object is checked for link markdown. If no link markdown is found, the TextNode object is appended to the new_nodes list. If link markdown is found, the text is split into sections using the link markdown. If the number of sections after splitting is not equal to 2, indicating an invalid markdown format, a ValueError is raised. The function then iterates over the sections and creates new TextNode objects with the appropriate text and text_type. The new TextNode objects are appended to the new_nodes list. Finally, the new_nodes list is returned.
+    This function takes a list of TextNode objects representing the original text and splits it into a new list of TextNode objects based on link markdown. It iterates over each TextNode object in the old_nodes list and checks if its text_type is not equal to text_type_text. If it is not, the TextNode object is appended to the new_nodes list without modification. If it is, the spans of the link markdown in its text are found with a single `finditer` scan, and the text is sliced once at those spans into text nodes and link nodes, which are appended to the new_nodes list. Finally, the new_nodes list is returned.
 """
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != text_type_text:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        text = old_node.text
+        first = len(new_nodes)
+        if not _append_matches(new_nodes, text, 0, len(text), LINK_PATTERN, text_type_link):
+            del new_nodes[first:]
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], text_type_text))
-            new_nodes.append(TextNode(link[0], text_type_link, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, text_type_text))
     return new_nodes
 
 
@@ -165,9 +201,7 @@ def extract_markdown_images(text):
         >>> extract_markdown_images("![alt text](https://example.com/image.jpg)")
         [('alt text', 'https://example.com/image.jpg')]
     """
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
@@ -187,6 +221,4 @@ def extract_markdown_links(text):
         >>> extract_markdown_links("[link text](https://example.com)")
         [('link text', 'https://example.com')]
     """
-    pattern = r"\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
\ No newline at end of file
+    return LINK_PATTERN.findall(text)
\ No newline at end of file
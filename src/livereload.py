@@ -0,0 +1,128 @@
+import asyncio
+import posixpath
+
+# The server-sent events endpoint the injected client connects to
+LIVERELOAD_PATH = "/__livereload"
+
+# Reloads the page when it is rebuilt, and refreshes stylesheets in place when a CSS file changes
+CLIENT_SCRIPT = b"""<script>
+(function () {
+    var source = new EventSource("%s?page=" + encodeURIComponent(location.pathname));
+    source.onmessage = function (event) {
+        if (event.data.indexOf("css:") !== 0) {
+            location.reload();
+            return;
+        }
+        document.querySelectorAll('link[rel="stylesheet"]').forEach(function (link) {
+            var url = new URL(link.href);
+            url.searchParams.set("livereload", Date.now());
+            link.href = url.href;
+        });
+    };
+})();
+</script>
+""" % LIVERELOAD_PATH.encode()
+
+
+def inject_client(html):
+    """
+    Adds the live reload client script to an HTML page.
+
+    Args:
+        html (bytes): The HTML page.
+
+    Returns:
+        bytes: The page with the script inserted before its closing body tag, or appended if it has none.
+    """
+    position = html.lower().rfind(b"</body>")
+    if position == -1:
+        return html + CLIENT_SCRIPT
+    return html[:position] + CLIENT_SCRIPT + html[position:]
+
+
+def page_for_url(url_path):
+    """
+    Maps the URL path of a page to the output path of the HTML file served for it.
+
+    Args:
+        url_path (str): The URL path, such as "/majesty/".
+
+    Returns:
+        str: The output path relative to the public directory, such as "majesty/index.html".
+
+    Example:
+        >>> page_for_url("/")
+        'index.html'
+    """
+    path = posixpath.normpath("/" + url_path.split("?")[0]).lstrip("/")
+    if not path or path == ".":
+        return "index.html"
+    if path.endswith(".html"):
+        return path
+    return f"{path}/index.html"
+
+
+class LiveReloadHub:
+    """
+    Tracks the pages open in browsers and tells them when they have been rebuilt.
+
+    Attributes:
+        clients (dict): Maps the output path of each open page to the set of queues of the clients viewing it.
+
+    Clients subscribe from the server's event loop, while `notify()` is called by the watcher thread after each
+    rebuild and hands the changes over to the event loop. Only the clients viewing a rebuilt page are told to
+    reload; a changed stylesheet is sent to every client, which swaps it in without reloading the page.
+    """
+    def __init__(self):
+        self.clients = {}
+        self._loop = None
+
+    def subscribe(self, page):
+        """
+        Registers a client viewing a page. Must be called from the event loop.
+
+        Args:
+            page (str): The output path of the page, see `page_for_url()`.
+
+        Returns:
+            asyncio.Queue: The queue the messages for the client are put in.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        self.clients.setdefault(page, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, page, queue):
+        """
+        Removes a client registered with `subscribe()`.
+
+        Args:
+            page (str): The output path of the page.
+            queue (asyncio.Queue): The queue returned by `subscribe()`.
+        """
+        queues = self.clients.get(page)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.clients[page]
+
+    def notify(self, changed):
+        """
+        Sends the changes of a rebuild to the affected clients. Safe to call from any thread.
+
+        Args:
+            changed (list): The output paths changed by the rebuild, relative to the public directory.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._send, list(changed))
+
+    def _send(self, changed):
+        for path in changed:
+            if path.endswith(".css"):
+                for queues in self.clients.values():
+                    for queue in queues:
+                        queue.put_nowait(f"css:{path}")
+            else:
+                for queue in self.clients.get(path, ()):
+                    queue.put_nowait(path)
@@ -0,0 +1,170 @@
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Parent of the loggers of every module, configured by `configure_logging()`
+LOGGER_NAME = "site"
+
+# The --log-level choices: "summary" reports the totals of each step of a build along with warnings and errors,
+# "verbose" adds every page and file and "quiet" only reports warnings and errors
+LOG_LEVELS = {"quiet": logging.WARNING, "summary": logging.INFO, "verbose": logging.DEBUG}
+
+# Attributes of every LogRecord; any other attribute was passed in `extra` and is a field of the JSON output
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+def get_logger(name):
+    """
+    Args:
+        name (str): The name of the module logging, normally __name__.
+
+    Returns:
+        logging.Logger: The logger of the module, a child of LOGGER_NAME.
+
+    Example:
+        >>> get_logger("generate").name
+        'site.generate'
+    """
+    return logging.getLogger(LOGGER_NAME).getChild(name)
+
+
+def configure_logging(level="summary", json_output=False, stream=None):
+    """
+    Sends the records of every logger of the generator to a stream through a background thread.
+
+    Args:
+        level (str, optional): One of LOG_LEVELS. Defaults to "summary".
+        json_output (bool, optional): Write one JSON object per record, for CI systems and log collectors, instead
+            of plain text. Defaults to False.
+        stream (file, optional): The stream written to. Defaults to sys.stderr.
+
+    Returns:
+        logging.handlers.QueueListener: The thread writing the records. It is stopped, writing out the records
+        still queued, by the next call or when the interpreter exits.
+
+    Logging a record only puts it on a queue, so the build never waits for the terminal or the CI log. The
+    thread writes the records as they arrive and only flushes the stream once the queue is empty, so a burst of
+    records costs one flush instead of one per record. Records below the level are discarded by the logging
+    call itself, before their message is even formatted.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    records = queue.SimpleQueue()
+    handler = _BufferedStreamHandler(stream or sys.stderr, records)
+    handler.setFormatter(JSONFormatter() if json_output else TextFormatter())
+    logger = logging.getLogger(LOGGER_NAME)
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(LOG_LEVELS[level])
+    logger.propagate = False
+    _listener = _FlushingQueueListener(records, handler)
+    _listener.start()
+    return _listener
+
+
+@contextlib.contextmanager
+def capture_logs(level):
+    """
+    Collects the records logged in the with block instead of writing them, so that a worker process can send them
+    back to the process that configured logging.
+
+    Args:
+        level (int): The level of the parent process, see `logging.Logger.getEffectiveLevel()`.
+
+    Yields:
+        list: The records, with their messages formatted so they can be pickled. Pass them to `replay_logs()`.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    records = []
+    saved = logger.handlers, logger.level, logger.propagate
+    logger.handlers = [_ListHandler(records)]
+    logger.setLevel(level)
+    logger.propagate = False
+    try:
+        yield records
+    finally:
+        logger.handlers, logger.level, logger.propagate = saved
+
+
+def replay_logs(records):
+    """
+    Logs records collected by `capture_logs()` in this process.
+    """
+    for record in records:
+        logging.getLogger(record.name).handle(record)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats records as their message, prefixed by the level for warnings and errors, like "Error: ...".
+    """
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname.capitalize()}: {message}"
+        return message
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects with the time, level, logger and message of the record and the
+    fields passed in `extra`, such as the page being generated.
+
+    Example:
+        {"time": 1718000000.123, "level": "info", "logger": "site.generate", "message": "2 of 2 pages generated, 0 unchanged", "generated": 2, "pages": 2}
+    """
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((name, value) for name, value in vars(record).items() if name not in RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """
+    StreamHandler that only flushes once the queue it is fed from is empty.
+    """
+    def __init__(self, stream, records):
+        super().__init__(stream)
+        self.records = records
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if self.records.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    def start(self):
+        super().start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        super().stop()
+        atexit.unregister(self.stop)
+        for handler in self.handlers:
+            handler.flush()
+
+
+class _ListHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        self.queue.append(record)
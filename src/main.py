@@ -1,7 +1,15 @@
+import argparse
 import os
-import shutil
-from copy_static import copy_files_recursive
+from compress import compress_outputs
+from copy_static import COPY_STRATEGIES, sync_files_recursive
+from etags import write_etags
 from generate import generate_pages_recursive#, generate_and_traverse, generate_page
+from log import LOG_LEVELS, configure_logging, get_logger
+from manifest import Manifest
+from profiler import BuildProfile, NullProfile
+from publish import publish_generation, stage_generation
+from render_cache import RenderCache
+from watch import SiteWatcher
 # Define directories for static and public files
 dir_static = "./static"
 dir_public = "./public"
@@ -11,30 +19,163 @@ FROM_PATH = "./content/index.md"
 TEMPLATE_PATH = 'template.html'
 DEST_PATH = "public/index.html"
 CONTENT_DIR = "./content"
+MANIFEST_PATH = "./.build/manifest.json"
+GENERATIONS_DIR = "./.build/generations"
+PROFILE_PATH = "./.build/profile.folded"
+
+logger = get_logger("main")
 # Function to extract the title from markdown content
 
 
-# Main function to delete and recreate public directory, copy static files, and generate the page
-def main():
+# Main function to stage a new generation of the site, copy static files, generate the pages and publish it
+def main(argv=None):
     """
-    Deletes the public directory, recreates it, and copies static files to it.
-    Then generates HTML pages from markdown files using the specified template.
-    
-    This function does not take any parameters.
-    
+    Builds the site into a new generation directory by copying static files to it and generating HTML pages
+    from markdown files using the specified template, then atomically switches the public directory to it.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv.
+
+    The public directory is a symlink into GENERATIONS_DIR, so the site keeps being served from the previous
+    generation for the whole build. With --incremental the new generation starts as a hardlinked clone of the
+    previous one, only changed static files are copied and only pages whose markdown, template, partials or
+    linked static files changed since the previous build are regenerated. Unless --no-compress is given, the
+    files written by the build then get precompressed .gz and .br siblings for the server to send as is. Finally the
+    content hash of every file is recorded for the server to use as its ETag. Either way the build manifest is written to MANIFEST_PATH so that the
+    next incremental build knows what is already up to date. With --profile the time, CPU time and net live memory blocks of
+    every stage of the build and of every page are measured, the slowest pages and the stage totals are printed and
+    the measurements are written as collapsed stacks for flame graph tools. With --watch the process then keeps
+    running and updates the published generation whenever a source changes.
+
+    Progress is logged through a background thread. By default only a summary of each step is logged, --log-level
+    verbose adds every page and file, and --log-format json writes one JSON object per line for CI systems.
+
     This function does not return anything.
     """
-    print("Deleting Public Directory")
-    if os.path.exists(dir_public):
-        shutil.rmtree(dir_public)
-    os.makedirs(dir_public, exist_ok=True)
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the previous build and only regenerate pages whose markdown or other inputs changed",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Render pages in N worker processes (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Cache the HTML rendered for each markdown file in DIR and reuse it across builds",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="Size the render cache is trimmed to (default: 256)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="Compare the contents of static files whose size matches but whose modification time differs",
+    )
+    parser.add_argument(
+        "--copy-strategy",
+        choices=("auto",) + COPY_STRATEGIES,
+        default="auto",
+        help="How static files are published: hardlink, reflink, in-kernel copy or plain copy. "
+        "Unsupported strategies fall back to the next one (default: auto, which starts with reflink and never "
+        "hardlinks)",
+    )
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Do not write precompressed .gz and .br variants of the generated pages and static files",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the build, keep watching the content, static files and template and rebuild only the affected pages",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_PATH,
+        metavar="FILE",
+        help="Measure every stage of the build, print the slowest pages and stage totals and write a flame graph "
+        f"dump (collapsed stacks) to FILE (default: {PROFILE_PATH})",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=tuple(LOG_LEVELS),
+        default="summary",
+        help="summary logs the totals of each step, verbose adds every page and file, quiet only logs problems "
+        "(default: summary)",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=("text", "json"),
+        default="text",
+        help="Log plain text or one JSON object per line, e.g. for CI (default: text)",
+    )
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=8,
+        metavar="N",
+        help="Copy static files on N threads (default: 8)",
+    )
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level, json_output=args.log_format == "json")
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    cache = RenderCache(args.cache_dir, args.cache_size << 20) if args.cache_dir else None
+    profile = BuildProfile() if args.profile else NullProfile()
+
+    with profile.stage("build"):
+        with profile.stage("stage_generation"):
+            if args.incremental:
+                manifest = Manifest.load(MANIFEST_PATH)
+            else:
+                manifest = Manifest(MANIFEST_PATH)
+            staging = stage_generation(dir_public, GENERATIONS_DIR, reuse=args.incremental)
 
-    print("Copying Static Files")
-    copy_files_recursive(dir_static, dir_public)
+        logger.debug("Copying static files")
+        with profile.stage("static_copy"):
+            sync_files_recursive(dir_static, staging, manifest, args.checksum, args.copy_strategy, args.copy_workers)
 
-    generate_pages_recursive(CONTENT_DIR, TEMPLATE_PATH, dir_public)
+        with profile.stage("pages"):
+            generate_pages_recursive(
+                CONTENT_DIR, TEMPLATE_PATH, staging, manifest, jobs, cache, dir_static,
+                profile if args.profile else None,
+            )
+
+        manifest.compressed = not args.no_compress
+        if manifest.compressed:
+            with profile.stage("compress"):
+                compress_outputs(staging, workers=os.cpu_count(), assets=manifest.assets)
+        with profile.stage("etags"):
+            write_etags(staging)
+
+        with profile.stage("publish"):
+            publish_generation(dir_public, staging, GENERATIONS_DIR)
+            manifest.save()
+    logger.info("Published %s", staging, extra={"generation": staging})
+
+    if args.profile:
+        profile.report()
+        profile.write_collapsed(args.profile)
+        logger.info("Wrote the profile to %s", args.profile, extra={"profile": args.profile})
+
+    if args.watch:
+        watcher = SiteWatcher(
+            CONTENT_DIR, TEMPLATE_PATH, dir_static, dir_public, manifest, cache, args.copy_strategy,
+            compress=manifest.compressed,
+        )
+        watcher.run_forever()
     #generate_page(FROM_PATH, TEMPLATE_PATH, DEST_PATH)
     #traverse_and_generate(CONTENT_DIR, dir_public, TEMPLATE_PATH)
 if __name__ == "__main__":
     main()
-
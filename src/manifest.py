@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+from depgraph import DependencyGraph
+
+MANIFEST_VERSION = 3
+
+
+def hash_file(path):
+    """
+    Computes the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path (str): The path to the file to hash.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Persisted record of the sources and outputs of the previous build.
+
+    Attributes:
+        path (str): The path of the JSON file the manifest is stored in.
+        pages (dict): Maps each markdown source path to a dict with its output path ("dest"),
+            content hash ("hash"), size ("size") and modification time ("mtime_ns").
+        assets (set): The output paths of the static files copied by the previous build.
+        graph (DependencyGraph): The template, partials and linked static files each page was rendered from.
+        verified (dict): Maps the static files that `--checksum` found identical to their published copy despite a
+            different modification time to the [source, published] modification times, see `sync_files_recursive()`.
+        compressed (bool): Whether the build wrote precompressed siblings of its outputs, so that a later rebuild
+            of some of them, such as the watch mode's, does the same.
+
+    Output paths are relative to the output directory, so the manifest stays valid when a build is
+    written to a new directory. The size and modification time are kept so that unchanged sources can
+    be recognised with a single stat call instead of re-hashing their contents on every build.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.assets = set()
+        self.graph = DependencyGraph()
+        self.verified = {}
+        self.compressed = True
+        self.seen = set()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a manifest from disk.
+
+        Args:
+            path (str): The path of the manifest file.
+
+        Returns:
+            Manifest: The loaded manifest, or an empty one if the file is missing, unreadable or was
+            written by a different manifest version.
+        """
+        manifest = cls(path)
+        try:
+            with open(path, encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        manifest.pages = data.get("pages", {})
+        manifest.assets = set(data.get("assets", []))
+        manifest.graph = DependencyGraph.from_dict(data.get("graph", {}))
+        manifest.verified = data.get("verified", {})
+        manifest.compressed = data.get("compressed", True)
+        return manifest
+
+    def save(self):
+        """
+        Writes the manifest to disk, replacing the previous file atomically.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "pages": self.pages,
+            "assets": sorted(self.assets),
+            "graph": self.graph.to_dict(),
+            "verified": self.verified,
+            "compressed": self.compressed,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def source_hash(self, from_path):
+        """
+        Returns the content hash of a source file, reusing the recorded hash when the file's size
+        and modification time are unchanged.
+
+        Args:
+            from_path (str): The path to the source file.
+
+        Returns:
+            tuple: The content hash and the os.stat_result of the file.
+        """
+        stat = os.stat(from_path)
+        entry = self.pages.get(from_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"], stat
+        return hash_file(from_path), stat
+
+    def is_fresh(self, from_path, dest_path, source_hash):
+        """
+        Checks whether the output of a page from the previous build can be kept as is.
+
+        Args:
+            from_path (str): The path to the markdown source.
+            dest_path (str): The output path of the page, relative to the output directory.
+            source_hash (str): The current content hash of the markdown source.
+
+        Returns:
+            bool: True if neither the source nor the output path changed. Changes to the other inputs of the
+            page are tracked by the dependency graph.
+        """
+        self.seen.add(from_path)
+        entry = self.pages.get(from_path)
+        return (
+            entry is not None
+            and entry["hash"] == source_hash
+            and entry["dest"] == dest_path
+        )
+
+    def record(self, from_path, dest_path, source_hash, stat):
+        """
+        Records a successfully generated page.
+
+        Args:
+            from_path (str): The path to the markdown source.
+            dest_path (str): The output path of the page, relative to the output directory.
+            source_hash (str): The content hash of the markdown source.
+            stat (os.stat_result): The stat result of the markdown source.
+        """
+        self.seen.add(from_path)
+        self.pages[from_path] = {
+            "dest": dest_path,
+            "hash": source_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def forget(self, from_path):
+        """
+        Drops a page from the manifest so that it is regenerated by the next build.
+
+        Args:
+            from_path (str): The path to the markdown source.
+        """
+        self.seen.add(from_path)
+        self.pages.pop(from_path, None)
+        self.graph.remove_page(from_path)
+
+    def prune(self, output_dir):
+        """
+        Removes the outputs of pages whose sources were not seen during this build.
+
+        Args:
+            output_dir (str): The output directory of this build.
+
+        Returns:
+            list: The output paths that were removed.
+        """
+        removed = []
+        for from_path in [path for path in self.pages if path not in self.seen]:
+            dest_path = self.remove(from_path, output_dir)
+            if dest_path is not None:
+                removed.append(dest_path)
+        return removed
+
+    def remove(self, from_path, output_dir):
+        """
+        Drops a page whose source was deleted and removes its output.
+
+        Args:
+            from_path (str): The path to the markdown source.
+            output_dir (str): The output directory of this build.
+
+        Returns:
+            str: The output path that was removed, or None if the page had no output.
+        """
+        self.graph.remove_page(from_path)
+        entry = self.pages.pop(from_path, None)
+        if entry is None:
+            return None
+        dest_path = os.path.join(output_dir, entry["dest"])
+        try:
+            os.remove(dest_path)
+        except FileNotFoundError:
+            return None
+        try:
+            os.rmdir(os.path.dirname(dest_path))
+        except OSError:
+            pass
+        return dest_path
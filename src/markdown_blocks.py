@@ -10,6 +10,10 @@ block_type_ulist = "unordered_list"
 block_type_olist = "ordered_list"
 block_type_image = "image"
 
+HEADING_PATTERN = re.compile(r"#{1,6}\s+\S")
+CODE_PATTERN = re.compile(r"```.*?```$", re.DOTALL)
+IMAGE_BLOCK_PATTERN = re.compile(r"!\[.*?\]\((.*?)\)")
+
 def markdown_to_blocks(markdown):
     """
     Splits a markdown text into blocks.
@@ -39,6 +43,69 @@ def markdown_to_blocks(markdown):
     except AttributeError:
         raise ValueError("Input string cannot be None")
 
+def iter_buffer_blocks(buffer, encoding="utf-8", window=64 << 10):
+    """
+    Lazily splits encoded markdown held in a buffer, such as a memory-mapped file, into blocks.
+
+    Args:
+        buffer (bytes-like): The encoded markdown. Anything with `find()`, `rfind()` and slicing works, such as
+            bytes or mmap.
+        encoding (str, optional): The encoding of the markdown, which must encode "\n" and "\r" as the single bytes
+            0x0A and 0x0D and never use those bytes inside another character, as UTF-8 does. Defaults to "utf-8".
+        window (int, optional): The number of bytes decoded at a time. Defaults to 64 KB.
+
+    Yields:
+        str: Each block, stripped, the same as `markdown_to_blocks()` returns for the decoded text.
+
+    The buffer is cut into windows of about `window` bytes, each ending inside a blank line found by searching
+    the raw bytes for b"\n\n" or b"\n\r\n", so every window holds whole blocks, whole characters and whole line
+    endings. Only one window at a time is copied out of the buffer and decoded, which is faster than decoding
+    block by block and keeps memory bounded however large the buffer is. A block larger than a window gets a
+    window of its own. Each window has its "\r\n" and "\r" line endings translated to "\n", as reading the file
+    in text mode does; a file using only "\r" has no cut points and is decoded as a single window.
+
+    Example:
+        >>> list(iter_buffer_blocks(b"# Title\n\n\nSome text"))
+        ['# Title', 'Some text']
+    """
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = start + window
+        if end >= size:
+            end = size
+        else:
+            cut = max(buffer.rfind(b"\n\n", start, end), buffer.rfind(b"\n\r\n", start, end))
+            if cut == -1:
+                cuts = [cut for cut in (buffer.find(b"\n\n", end), buffer.find(b"\n\r\n", end)) if cut != -1]
+                cut = min(cuts, default=-1)
+            # Cut right after the first "\n", which can never split a "\r\n"
+            end = size if cut == -1 else cut + 1
+        text = buffer[start:end].decode(encoding)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        for block in text.split("\n\n"):
+            block = block.strip()
+            if block:
+                yield block
+        start = end
+
+def blocks_to_html_node(blocks):
+    """
+    Converts markdown blocks into an HTML node tree that is built as it is written.
+
+    Args:
+        blocks (iterable): The blocks, such as those yielded by `iter_buffer_blocks()`.
+
+    Returns:
+        ParentNode: A div whose children are produced lazily, block by block. It can only be serialized once, with
+        `write_html()` or `to_html()`, and the blocks must stay readable until then.
+
+    Written with `write_html()`, each block is read, parsed and written before the next one is read, so the
+    whole document is never held in memory, neither as markdown nor as nodes.
+    """
+    return ParentNode("div", (block_to_html_node(block) for block in blocks), None)
+
 def markdown_to_blocks2(markdown):
     """
     Splits a markdown text into blocks.
@@ -82,50 +149,54 @@ def block_to_block_type(block):
             - "paragraph" if the block is a regular paragraph.
             - "image" if the block is an image
 
-    This function takes a block of text and checks its format to determine its type. It uses regular expressions to match the block against different patterns for headings, code blocks, quote blocks, unordered lists, and ordered lists. If none of these patterns match, it assumes the block is a regular paragraph.
+    This function takes a block of text and looks up its first character in a dispatch table. Each block type starts with a different character, so only the check for that character's block type runs: a precompiled pattern for headings, code blocks and images, a look at the second character for quote blocks and unordered lists, and a linear scan of the line numbers for ordered lists. If the check fails or no block type starts with that character, it assumes the block is a regular paragraph.
 
     Example:
         >>> block = "# Heading"
         >>> block_to_block_type(block)
         'heading'
     """
-    # Check for headings
-    heading_match = re.match(r'^#{1,6}\s+\S', block)
-    if heading_match:
-        return block_type_heading
-
-    # Check for code blocks
-    code_match = re.match(r'^```.*?```$', block, re.DOTALL)
-    if code_match:
-        return block_type_code
-
-    # Check for quote blocks
-    quote_match = re.match(r'^>\s+.*', block, re.MULTILINE)
-    if quote_match:
-        return block_type_quote
-
-    # Check for unordered list blocks
-    unordered_list_match = re.match(r'^[\*\-]\s+.*', block, re.MULTILINE)
-    if unordered_list_match:
-        return block_type_ulist
-    
-    image_match = re.match(r'!\[.*?\]\((.*?)\)', block, re.MULTILINE)
-    if image_match:
-        return block_type_image
-
-    # Check for ordered list blocks
-    ordered_list_match = re.match(r'^1\.\s+.*', block, re.MULTILINE)
-    if ordered_list_match:
-        lines = block.split('\n')
-        for i, line in enumerate(lines):
-            if not re.match(rf'^{i+1}\.\s+.*', line):
-                break
-        else:
-            return block_type_olist
-
-    # If none of the above conditions are met, it's a paragraph
+    entry = BLOCK_TYPE_DISPATCH.get(block[:1])
+    if entry is not None and entry[0](block):
+        return entry[1]
     return block_type_paragraph
 
+def _is_heading(block):
+    return HEADING_PATTERN.match(block) is not None
+
+def _is_code(block):
+    return CODE_PATTERN.match(block) is not None
+
+def _is_image(block):
+    return IMAGE_BLOCK_PATTERN.match(block) is not None
+
+def _is_marked(block):
+    """
+    Checks that the marker character at the start of a quote or unordered list block is followed by whitespace.
+    """
+    return block[1:2].isspace()
+
+def _is_ordered_list(block):
+    """
+    Checks that every line of the block starts with its 1-based line number, a "." and whitespace.
+    """
+    for i, line in enumerate(block.split("\n")):
+        prefix = f"{i + 1}."
+        if not line.startswith(prefix) or not line[len(prefix):len(prefix) + 1].isspace():
+            return False
+    return True
+
+# Maps the first character of a block to the check for the block type starting with it
+BLOCK_TYPE_DISPATCH = {
+    "#": (_is_heading, block_type_heading),
+    "`": (_is_code, block_type_code),
+    ">": (_is_marked, block_type_quote),
+    "*": (_is_marked, block_type_ulist),
+    "-": (_is_marked, block_type_ulist),
+    "!": (_is_image, block_type_image),
+    "1": (_is_ordered_list, block_type_olist),
+}
+
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
     children = []
@@ -167,8 +238,7 @@ def image_to_html_node(block):
     Raises:
         ValueError: If the image block is invalid or does not match the pattern.
     """
-    pattern = r'!\[.*?\]\((.*?)\)'
-    match = re.match(pattern, block)
+    match = IMAGE_BLOCK_PATTERN.match(block)
     if not match:
         raise ValueError("Invalid image block")
 
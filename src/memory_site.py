@@ -0,0 +1,307 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+from email.utils import formatdate
+from compress import ENCODINGS, is_compressible, preferred_encoding
+from etags import ETAGS_FILE, cache_control, load_etags
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# A precomputed response: the status, the complete list of raw headers, the body, the ETag, the Last-Modified date,
+# the headers of a 304 response and the precompressed variants of the response by content coding, in order of
+# preference
+Entry = namedtuple("Entry", ["status", "headers", "body", "etag", "last_modified", "not_modified_headers", "variants"])
+
+# The headers repeated in a 304 response, besides the ETag
+NOT_MODIFIED_HEADERS = (b"cache-control", b"last-modified", b"vary")
+
+# Types served with an explicit charset, since every generated text file is UTF-8
+TEXT_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+class InMemorySite:
+    """
+    ASGI app serving a built site from memory.
+
+    Attributes:
+        public_dir (str): The public directory, normally a symlink to the published generation.
+        transform (callable): Applied to the body of every HTML page when it is loaded, or None.
+        poll_interval (float): How often, in seconds, the public directory is checked for a new generation.
+        generation (str): The directory the site in memory was loaded from.
+
+    Every file of the site is read once, with its headers and ETag computed up front, so a request is answered
+    with one dict lookup and a single send of bytes that are already in memory, without touching the filesystem.
+    The .gz and .br siblings written by the build are loaded as variants of their file and sent to clients that
+    accept them, so nothing is compressed at runtime. ETags are the content hashes recorded by the build, and
+    conditional requests are answered with 304 Not Modified. Fingerprinted files are sent with an immutable
+    Cache-Control header and the others have to be revalidated.
+    The paths are resolved like StaticFiles with html=True: "/dir/" serves "dir/index.html", "/dir" redirects to
+    "/dir/" and unknown paths get 404.html if there is one.
+
+    When the public directory is switched to a new generation, the whole site is loaded into a new dict which
+    then replaces the old one in a single assignment, so every request is answered entirely from one generation.
+    """
+    def __init__(self, public_dir, transform=None, poll_interval=0.5):
+        self.public_dir = public_dir
+        self.transform = transform
+        self.poll_interval = poll_interval
+        self.generation = None
+        self._files = {}
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.load()
+
+    def load(self):
+        """
+        Loads the current generation of the public directory into memory and starts serving it.
+
+        Returns:
+            int: The number of files loaded.
+        """
+        with self._lock:
+            generation = os.path.realpath(self.public_dir)
+            etags = load_etags(generation)
+            files = {}
+            for dirpath, _, filenames in os.walk(generation):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    relative_path = os.path.relpath(path, generation).replace(os.sep, "/")
+                    if relative_path == ETAGS_FILE or _is_variant(path):
+                        continue
+                    files[relative_path] = self._entry(path, relative_path, etags)
+            self._files = files
+            self._routes = _routes(files)
+            self.generation = generation
+            return len(files)
+
+    def update(self, paths):
+        """
+        Reloads some files of the current generation, such as those changed by a watch mode rebuild.
+
+        Args:
+            paths (iterable): The changed paths, relative to the public directory. Paths that no longer exist are
+                removed from the site.
+        """
+        with self._lock:
+            etags = load_etags(self.generation)
+            files = dict(self._files)
+            for relative_path in paths:
+                relative_path = relative_path.replace(os.sep, "/")
+                path = os.path.join(self.generation, relative_path)
+                if _is_variant(path):
+                    relative_path, path = os.path.splitext(relative_path)[0], os.path.splitext(path)[0]
+                try:
+                    files[relative_path] = self._entry(path, relative_path, etags)
+                except FileNotFoundError:
+                    files.pop(relative_path, None)
+            self._files = files
+            self._routes = _routes(files)
+
+    def _entry(self, path, relative_path, etags):
+        """
+        Reads a file and its precompressed siblings and precomputes the responses serving them.
+
+        Args:
+            path (str): The path of the file.
+            relative_path (str): The path of the file relative to the generation.
+            etags (dict): The ETags recorded by the build, see `load_etags()`.
+
+        Returns:
+            Entry: The response.
+        """
+        with open(path, "rb") as site_file:
+            body = site_file.read()
+            last_modified = formatdate(os.fstat(site_file.fileno()).st_mtime, usegmt=True).encode()
+        content_type = mimetypes.guess_type(relative_path)[0] or "application/octet-stream"
+        transformed = content_type == "text/html" and self.transform is not None
+        if transformed:
+            body = self.transform(body)
+        if content_type.startswith(TEXT_TYPES):
+            content_type += "; charset=utf-8"
+        status = 404 if relative_path == "404.html" else 200
+        headers = [
+            (b"content-type", content_type.encode()),
+            (b"cache-control", cache_control(relative_path).encode()),
+            (b"last-modified", last_modified),
+        ]
+        # The siblings were compressed from the untransformed file, so they cannot be sent for a transformed one
+        variants = {}
+        if is_compressible(path) and not transformed:
+            headers.append((b"vary", b"Accept-Encoding"))
+            for suffix, encoding in ENCODINGS.items():
+                try:
+                    with open(path + suffix, "rb") as variant_file:
+                        variant = variant_file.read()
+                except FileNotFoundError:
+                    continue
+                variant_headers = headers + [(b"content-encoding", encoding.encode())]
+                etag = etags.get(relative_path + suffix)
+                variants[encoding] = _response(status, variant_headers, variant, etag, last_modified, {})
+        # The transformed body no longer matches the hash recorded by the build
+        etag = None if transformed else etags.get(relative_path)
+        return _response(status, headers, body, etag, last_modified, variants)
+
+    def start(self):
+        """
+        Starts polling the public directory on a background thread and loading each new generation.
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._poll, name="site-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops polling the public directory.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self):
+        while not self._stopped.wait(self.poll_interval):
+            if os.path.realpath(self.public_dir) == self.generation:
+                continue
+            try:
+                count = self.load()
+            except OSError as e:
+                logger.error("Unable to load %s. %s", self.public_dir, e)
+                continue
+            logger.info("Serving %d files from %s", count, self.generation)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await send({"type": "http.response.start", "status": 405, "headers": [(b"allow", b"GET, HEAD")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        route = self._routes.get(scope["path"])
+        if route is None:
+            route = self._routes.get(None)
+        elif isinstance(route, str):
+            await send({"type": "http.response.start", "status": 307, "headers": [(b"location", route.encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if route is None:
+            await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Not Found"})
+            return
+        if route.variants:
+            encoding = preferred_encoding(
+                (_header(scope, b"accept-encoding") or b"").decode("latin-1"), route.variants
+            )
+            if encoding is not None:
+                route = route.variants[encoding]
+        if route.status == 200 and _is_not_modified(scope, route):
+            await send({"type": "http.response.start", "status": 304, "headers": route.not_modified_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": route.status, "headers": route.headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else route.body})
+
+    async def _lifespan(self, receive, send):
+        """
+        Polls for new generations while the app runs as the top-level ASGI app.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _response(status, headers, body, etag, last_modified, variants):
+    """
+    Completes the headers of a response with its length and ETag.
+
+    Args:
+        etag (str): The ETag recorded by the build, or None to hash the body.
+
+    Returns:
+        Entry: The response.
+    """
+    if etag is None:
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    etag = etag.encode()
+    not_modified_headers = [(name, value) for name, value in headers if name in NOT_MODIFIED_HEADERS]
+    not_modified_headers.append((b"etag", etag))
+    headers = headers + [(b"content-length", str(len(body)).encode()), (b"etag", etag)]
+    return Entry(status, headers, body, etag, last_modified, not_modified_headers, variants)
+
+
+def _is_not_modified(scope, route):
+    """
+    Checks the conditional headers of a request against a response, If-None-Match taking precedence over
+    If-Modified-Since.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 response can be sent.
+    """
+    if_none_match = _header(scope, b"if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")}
+        return route.etag in tags or b"*" in tags
+    return _header(scope, b"if-modified-since") == route.last_modified
+
+
+def _is_variant(path):
+    """
+    Returns:
+        bool: True if the file is a precompressed sibling of another file.
+    """
+    return path.endswith(tuple(ENCODINGS)) and os.path.exists(os.path.splitext(path)[0])
+
+
+def _routes(files):
+    """
+    Maps the URL paths of a site to the responses serving them.
+
+    Args:
+        files (dict): Maps the relative path of every file to its Entry.
+
+    Returns:
+        dict: Maps URL paths to an Entry, or to the path to redirect to for directories requested without a
+        trailing slash. The None key holds the 404 page, if the site has one.
+    """
+    routes = {}
+    for relative_path in files:
+        if relative_path.endswith("/index.html"):
+            directory = f"/{relative_path[:-len('index.html')]}"
+            routes[directory.rstrip("/")] = directory
+    for relative_path, entry in files.items():
+        routes[f"/{relative_path}"] = entry
+        if relative_path == "index.html":
+            routes["/"] = entry
+        elif relative_path.endswith("/index.html"):
+            routes[f"/{relative_path[:-len('index.html')]}"] = entry
+    if "404.html" in files:
+        routes[None] = files["404.html"]
+    return routes
+
+
+def _header(scope, name):
+    """
+    Returns:
+        bytes: The value of a request header, or None if the request does not have it.
+    """
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
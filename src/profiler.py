@@ -0,0 +1,207 @@
+import contextlib
+import os
+import sys
+import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Stands in for the page in the stacks of per-page stages, so the stages of all pages add up to one total
+PAGE_FRAME = "<page>"
+
+
+class BuildProfile:
+    """
+    Records the wall time, CPU time and net change in live memory blocks of the stages of a build.
+
+    Attributes:
+        stages (dict): Maps (page, stack) keys to [wall seconds, CPU seconds, net live blocks, calls]. The stack
+            is the tuple of nested stage names, with PAGE_FRAME in place of the page, and the page is None for the
+            stages outside of pages.
+        pages (dict): Maps the source path of every profiled page to [wall seconds, CPU seconds, net live blocks].
+
+    Stages are nested with the `stage()` and `page()` context managers. Memory is measured as the net change in
+    the number of memory blocks the interpreter has allocated and not yet freed (`sys.getallocatedblocks()`). That
+    is what a stage leaves alive, not how much it allocates: the temporaries it frees again do not count, and a
+    stage that frees more than it keeps has a negative count. It costs nothing to read, unlike tracemalloc. Worker
+    processes keep their own profile and send its `to_dict()` back to be merged with `merge()`.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.pages = {}
+        self._stack = ()
+        self._page = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Measures the code run in the with block as the stage `name`, nested in the current stage.
+        """
+        stack = self._stack
+        self._stack = stack + (name,)
+        wall, cpu, blocks = _counters()
+        try:
+            yield
+        finally:
+            elapsed = _elapsed(wall, cpu, blocks)
+            entry = self.stages.setdefault((self._page, self._stack), [0.0, 0.0, 0, 0])
+            _add(entry, elapsed)
+            entry[3] += 1
+            self._stack = stack
+
+    @contextlib.contextmanager
+    def page(self, path):
+        """
+        Measures the generation of the page rendered from `path`; the stages run in the with block are recorded
+        for that page.
+        """
+        previous = self._page
+        self._page = path
+        wall, cpu, blocks = _counters()
+        try:
+            with self.stage(PAGE_FRAME):
+                yield
+        finally:
+            _add(self.pages.setdefault(path, [0.0, 0.0, 0]), _elapsed(wall, cpu, blocks))
+            self._page = previous
+
+    @contextlib.contextmanager
+    def instrument(self, module, name, stage=None):
+        """
+        Measures every call to the function `name` of `module` made in the with block as a stage.
+
+        Args:
+            module (module): The module the function is looked up in by its callers.
+            name (str): The name of the function.
+            stage (str, optional): The name of the stage. Defaults to the name of the function.
+
+        The function is only replaced for the duration of the with block, so code that is not profiled pays
+        nothing for it.
+        """
+        function = getattr(module, name)
+
+        def measured(*args, **kwargs):
+            with self.stage(stage or name):
+                return function(*args, **kwargs)
+
+        setattr(module, name, measured)
+        try:
+            yield
+        finally:
+            setattr(module, name, function)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The recorded measurements, to be sent from a worker process and passed to `merge()`.
+        """
+        return {"stages": list(self.stages.items()), "pages": self.pages}
+
+    def merge(self, profile):
+        """
+        Adds the measurements of another profile, nested in the current stage.
+
+        Args:
+            profile (dict): The measurements returned by `to_dict()`.
+        """
+        for (page, stack), measured in profile["stages"]:
+            entry = self.stages.setdefault((page, self._stack + tuple(stack)), [0.0, 0.0, 0, 0])
+            _add(entry, measured)
+            entry[3] += measured[3]
+        for page, measured in profile["pages"].items():
+            _add(self.pages.setdefault(page, [0.0, 0.0, 0]), measured)
+
+    def totals(self):
+        """
+        Returns:
+            dict: Maps every stack of stages to its [wall seconds, CPU seconds, net live blocks, calls], added up
+            over all pages.
+        """
+        totals = {}
+        for (_, stack), measured in self.stages.items():
+            entry = totals.setdefault(stack, [0.0, 0.0, 0, 0])
+            _add(entry, measured)
+            entry[3] += measured[3]
+        return totals
+
+    def report(self, slowest=10):
+        """
+        Logs the slowest pages and the totals of every stage, one record per line of the tables. The records of
+        the rows carry the measurements as fields, for the JSON log format.
+
+        Args:
+            slowest (int, optional): The number of pages listed. Defaults to 10.
+        """
+        logger.info("Slowest %d of %d pages:", min(slowest, len(self.pages)), len(self.pages))
+        ranked = sorted(self.pages.items(), key=lambda item: item[1][0], reverse=True)
+        for page, (wall, cpu, blocks) in ranked[:slowest]:
+            logger.info(
+                "  %9.1f ms wall %9.1f ms CPU %+10d net live blocks  %s", wall * 1000, cpu * 1000, blocks, page,
+                extra={"page": page, "wall_ms": wall * 1000, "cpu_ms": cpu * 1000, "net_live_blocks": blocks},
+            )
+        logger.info("Stages:")
+        logger.info("  %-40s %10s %10s %10s %8s", "stage", "wall ms", "CPU ms", "net blocks", "calls")
+        for stack, (wall, cpu, blocks, calls) in sorted(self.totals().items()):
+            name = "  " * (len(stack) - 1) + stack[-1]
+            logger.info(
+                "  %-40s %10.1f %10.1f %+10d %8d", name, wall * 1000, cpu * 1000, blocks, calls,
+                extra={"stage": "/".join(stack), "wall_ms": wall * 1000, "cpu_ms": cpu * 1000, "net_live_blocks": blocks,
+                       "calls": calls},
+            )
+
+    def write_collapsed(self, path):
+        """
+        Writes the wall time of every stage in the collapsed stack format read by flamegraph.pl, speedscope and
+        similar tools.
+
+        Args:
+            path (str): The path of the file to write.
+
+        Each line is a stack of frames separated by ";" followed by the microseconds spent in the last frame
+        itself, excluding the stages nested in it. Pages appear as frames of their own, so the flame graph
+        shows which pages and which of their stages took the time.
+        """
+        self_times = {}
+        for (page, stack), (wall, *_) in self.stages.items():
+            frames = tuple(page.replace(";", "_") if frame == PAGE_FRAME else frame for frame in stack)
+            self_times[frames] = self_times.get(frames, 0.0) + wall
+            if len(frames) > 1:
+                self_times[frames[:-1]] = self_times.get(frames[:-1], 0.0) - wall
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as dump_file:
+            for frames, seconds in sorted(self_times.items()):
+                # Stages run in parallel worker processes can add up to more than the stage they are nested in
+                microseconds = round(seconds * 1_000_000)
+                if microseconds > 0:
+                    dump_file.write(f"{';'.join(frames)} {microseconds}\n")
+
+
+class NullProfile:
+    """
+    Stands in for a BuildProfile when the build is not profiled; every context manager does nothing.
+    """
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def page(self, path):
+        return contextlib.nullcontext()
+
+    def instrument(self, module, name, stage=None):
+        return contextlib.nullcontext()
+
+
+def _counters():
+    return time.perf_counter(), time.process_time(), sys.getallocatedblocks()
+
+
+def _elapsed(wall, cpu, blocks):
+    now_wall, now_cpu, now_blocks = _counters()
+    return now_wall - wall, now_cpu - cpu, now_blocks - blocks
+
+
+def _add(entry, measured):
+    entry[0] += measured[0]
+    entry[1] += measured[1]
+    entry[2] += measured[2]
@@ -0,0 +1,93 @@
+import os
+import shutil
+import time
+from copy_static import link_files_recursive
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+def current_generation(public_dir):
+    """
+    Finds the directory currently served as the public directory.
+
+    Args:
+        public_dir (str): The path of the public directory, normally a symlink to a generation.
+
+    Returns:
+        str: The path of the served directory, or None if nothing has been published yet.
+    """
+    if os.path.islink(public_dir):
+        target = os.path.realpath(public_dir)
+        return target if os.path.isdir(target) else None
+    if os.path.isdir(public_dir):
+        return public_dir
+    return None
+
+
+def stage_generation(public_dir, generations_dir, reuse=True):
+    """
+    Creates a new, unpublished generation directory to build the site into.
+
+    Args:
+        public_dir (str): The path of the public directory.
+        generations_dir (str): The directory holding every generation.
+        reuse (bool, optional): Start from a hardlinked clone of the current generation, so that only changed
+            files have to be written. Defaults to True.
+
+    Returns:
+        str: The path of the staging directory.
+
+    Example:
+        >>> stage_generation("./public", "./.build/generations")
+        './.build/generations/20240603T192640.123456789'
+    """
+    now = time.time_ns()
+    name = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now // 10**9)) + f".{now % 10**9:09d}"
+    staging = os.path.join(generations_dir, name)
+    os.makedirs(staging)
+    previous = current_generation(public_dir)
+    if reuse and previous is not None:
+        count = link_files_recursive(previous, staging)
+        logger.info("Reusing %d files from %s", count, previous, extra={"reused": count})
+    return staging
+
+
+def publish_generation(public_dir, staging, generations_dir):
+    """
+    Atomically switches the public directory to a finished generation.
+
+    Args:
+        public_dir (str): The path of the public directory.
+        staging (str): The generation to publish, as returned by `stage_generation()`.
+        generations_dir (str): The directory holding every generation.
+
+    The public directory is a symlink that is replaced by a new symlink in a single rename, so a server reading
+    from it sees either the complete previous generation or the complete new one. The previous generation is kept
+    for requests that are still reading from it, and all older generations, including those of failed builds, are
+    deleted.
+
+    If the public directory is still a plain directory from before staged builds, it is first moved into the
+    generations directory, which leaves it briefly missing this one time.
+    """
+    previous = current_generation(public_dir)
+    if previous is not None and not os.path.islink(public_dir):
+        previous = os.path.join(generations_dir, "legacy")
+        if os.path.exists(previous):
+            shutil.rmtree(previous)
+        os.rename(public_dir, previous)
+
+    link_path = f"{public_dir.rstrip(os.sep)}.tmp-link"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    public_parent = os.path.dirname(os.path.abspath(public_dir))
+    os.symlink(os.path.relpath(os.path.abspath(staging), public_parent), link_path)
+    os.replace(link_path, public_dir)
+
+    keep = {os.path.realpath(staging)}
+    if previous is not None:
+        keep.add(os.path.realpath(previous))
+    with os.scandir(generations_dir) as entries:
+        for entry in entries:
+            if os.path.realpath(entry.path) not in keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,123 @@
+import contextlib
+import hashlib
+import os
+
+# Bump to invalidate every cached page when the output format changes without a parser change
+RENDER_CACHE_VERSION = 1
+
+# Modules whose source determines the HTML rendered for a markdown string
+PARSER_MODULES = ("htmlnode", "textnode", "inline_markdown", "markdown_blocks")
+
+
+def parser_version():
+    """
+    Computes a version key for the markdown parser from RENDER_CACHE_VERSION and the source of the parser modules.
+
+    Returns:
+        str: A short hex digest that changes whenever any parser module changes.
+    """
+    digest = hashlib.sha256(str(RENDER_CACHE_VERSION).encode())
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_MODULES:
+        with open(os.path.join(src_dir, f"{name}.py"), "rb") as module_file:
+            digest.update(module_file.read())
+    return digest.hexdigest()[:16]
+
+
+class RenderCache:
+    """
+    On-disk cache mapping the hash of a markdown string to its rendered HTML.
+
+    Attributes:
+        root (str): The directory holding the cache, shared by every version.
+        directory (str): The directory holding the entries of this parser version.
+        max_bytes (int): The size the cache is trimmed back to when it grows past it.
+
+    Entries are plain files named after the SHA-256 of the markdown, written through a temporary file and
+    renamed into place, so any number of builds and worker processes can share the same cache directory.
+    A hit refreshes the entry's modification time, and when the cache grows past max_bytes the least
+    recently used entries, including those of other parser versions, are removed first.
+    """
+    def __init__(self, root, max_bytes=256 << 20, version=None):
+        self.root = root
+        self.directory = os.path.join(root, version or parser_version())
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def _path(self, markdown):
+        key = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def get(self, markdown):
+        """
+        Looks up the HTML rendered for a markdown string.
+
+        Args:
+            markdown (str): The markdown string.
+
+        Returns:
+            str: The cached HTML, or None if the markdown is not in the cache.
+        """
+        path = self._path(markdown)
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                html = cache_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return html
+
+    def put(self, markdown, html):
+        """
+        Stores the HTML rendered for a markdown string, evicting old entries if the cache is full.
+
+        Args:
+            markdown (str): The markdown string.
+            html (str): The HTML rendered from the markdown.
+        """
+        path = self._path(markdown)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            cache_file.write(html)
+        # Another build or worker may have stored the same entry already; only the difference counts then
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += size - replaced
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is at most three quarters of max_bytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * 3 // 4:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+        self._size = total
+
+    def _entries(self):
+        """
+        Yields:
+            tuple: The modification time, size and path of every entry in the cache.
+        """
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime_ns, stat.st_size, path
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+
+class SiteTestCase(unittest.TestCase):
+    """
+    Base class of the tests that build a site from sources written to a temporary directory, removed after each
+    test.
+
+    Attributes:
+        directory (str): The temporary directory.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        """
+        Returns:
+            str: The path of `name` in the temporary directory.
+        """
+        return os.path.join(self.directory, name)
+
+    def write(self, name, content):
+        """
+        Writes a file of the temporary directory, creating its parent directories, and moves its modification time
+        a second ahead, so that a rewrite is seen as a change even on filesystems with coarse timestamps.
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as output_file:
+            output_file.write(content)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
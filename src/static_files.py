@@ -0,0 +1,116 @@
+import os
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from compress import is_compressible, precompressed_variant
+from etags import ETAGS_FILE, cache_control, load_etags
+
+# Request headers answered by this class rather than by StaticFiles, which would compare them to stat-based ETags
+CONDITIONAL_HEADERS = (b"if-none-match", b"if-modified-since")
+
+
+class SiteStaticFiles(StaticFiles):
+    """
+    StaticFiles for a site built by the generator.
+
+    The precompressed .br or .gz sibling of a file written by the build is sent when the client accepts it, so
+    responses are compressed without compressing anything per request. The ETag of every response is the content
+    hash recorded by the build, which stays the same when a later build rewrites an unchanged file, and conditional
+    requests are answered with 304 Not Modified. Fingerprinted files are sent with an immutable Cache-Control header
+    and the others have to be revalidated.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._etags = (None, None, {})
+
+    async def get_response(self, path, scope):
+        if path == ETAGS_FILE:
+            raise HTTPException(status_code=404)
+        request_headers = Headers(scope=scope)
+        response = await super().get_response(path, unconditional_scope(scope))
+        if not isinstance(response, FileResponse):
+            return response
+
+        if is_compressible(response.path):
+            response.headers["vary"] = "Accept-Encoding"
+            variant = precompressed_variant(response.path, request_headers.get("accept-encoding"))
+            if variant is not None:
+                variant_path, encoding = variant
+                response = FileResponse(
+                    variant_path,
+                    status_code=response.status_code,
+                    headers={"content-encoding": encoding, "vary": "Accept-Encoding"},
+                    media_type=response.media_type,
+                    stat_result=os.stat(variant_path),
+                )
+
+        generation, etags = self._build_etags()
+        relative_path = os.path.relpath(response.path, generation).replace(os.sep, "/")
+        response.headers["cache-control"] = cache_control(relative_path)
+        etag = etags.get(relative_path)
+        if etag is not None:
+            response.headers["etag"] = etag
+        if response.status_code == 200 and is_not_modified(response.headers, request_headers):
+            return not_modified_response(response.headers)
+        return response
+
+    def _build_etags(self):
+        """
+        Returns:
+            tuple: The directory currently served and the ETags recorded by its build, reloaded whenever the
+            build's ETAGS_FILE is replaced.
+        """
+        generation = os.path.realpath(self.directory)
+        try:
+            stat = os.stat(os.path.join(generation, ETAGS_FILE))
+        except FileNotFoundError:
+            return generation, {}
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if self._etags[0] != key:
+            self._etags = (key, generation, load_etags(generation))
+        return self._etags[1], self._etags[2]
+
+
+def unconditional_scope(scope):
+    """
+    Returns:
+        dict: A copy of an ASGI scope without the conditional headers, for getting the full response to a request.
+    """
+    scope = dict(scope)
+    scope["headers"] = [(name, value) for name, value in scope["headers"] if name not in CONDITIONAL_HEADERS]
+    return scope
+
+
+def not_modified_response(response_headers):
+    """
+    Args:
+        response_headers (Mapping): The headers of the full response.
+
+    Returns:
+        Response: The 304 Not Modified response, with the validators and caching headers of the full response.
+    """
+    headers = {
+        name: value for name, value in response_headers.items()
+        if name in ("cache-control", "etag", "last-modified", "vary")
+    }
+    return Response(status_code=304, headers=headers)
+
+
+def is_not_modified(response_headers, request_headers):
+    """
+    Checks the conditional headers of a request, If-None-Match taking precedence over If-Modified-Since.
+
+    Args:
+        response_headers (Mapping): The headers of the full response, with its "etag" and "last-modified".
+        request_headers (Headers): The headers of the request.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return response_headers.get("etag") in tags or "*" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    return if_modified_since is not None and if_modified_since == response_headers.get("last-modified")
@@ -0,0 +1,185 @@
+import os
+import re
+from collections import namedtuple
+
+# Matches "{{ Name }}" placeholders, with or without the inner spaces
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Matches "{{> path }}" partials, whose path is relative to the including file
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+
+Placeholder = namedtuple("Placeholder", ["name", "source"])
+
+# Compiled templates by path, each stored with the modification times of the files it was compiled from
+_template_cache = {}
+
+
+class Template:
+    """
+    A template compiled into a list of literal strings and placeholders.
+
+    Attributes:
+        segments (list): The literal strings and Placeholder tuples of the template, in order.
+        dependencies (list): The paths of the files the template was loaded from, the template file itself first
+            and then every partial it includes. Empty for templates compiled from a string.
+    """
+    def __init__(self, segments, dependencies=None):
+        self.segments = segments
+        self.dependencies = dependencies or []
+
+    @classmethod
+    def compile(cls, text):
+        """
+        Compiles a template string.
+
+        Args:
+            text (str): The template source.
+
+        Returns:
+            Template: The compiled template.
+
+        Example:
+            >>> Template.compile("<h1>{{ Title }}</h1>").segments
+            ['<h1>', Placeholder(name='Title', source='{{ Title }}'), '</h1>']
+        """
+        segments = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > position:
+                segments.append(text[position:match.start()])
+            segments.append(Placeholder(match.group(1), match.group()))
+            position = match.end()
+        if position < len(text):
+            segments.append(text[position:])
+        return cls(segments)
+
+    @property
+    def names(self):
+        """
+        Returns:
+            set: The names of all placeholders in the template.
+        """
+        return {segment.name for segment in self.segments if isinstance(segment, Placeholder)}
+
+    def render(self, context):
+        """
+        Renders the template to a string.
+
+        Args:
+            context (dict): Maps placeholder names to values. A value is either a string or an
+                HTMLNode, which is converted with `to_html()`. Placeholders missing from the context
+                are left in the output unchanged.
+
+        Returns:
+            str: The rendered template.
+
+        Example:
+            >>> Template.compile("<h1>{{ Title }}</h1>").render({"Title": "Home"})
+            '<h1>Home</h1>'
+        """
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            value = context.get(segment.name)
+            if value is None:
+                parts.append(segment.source)
+            elif isinstance(value, str):
+                parts.append(value)
+            else:
+                parts.append(value.to_html())
+        return "".join(parts)
+
+    def write(self, sink, context):
+        """
+        Renders the template into a file-like object. HTMLNode values are streamed with
+        `write_html()`, so their HTML is never held in memory as a single string.
+
+        Args:
+            sink: Any object with a `write(str)` method, such as an open file.
+            context (dict): Maps placeholder names to string or HTMLNode values, as for `render()`.
+        """
+        write = sink.write
+        for segment in self.segments:
+            if isinstance(segment, str):
+                write(segment)
+                continue
+            value = context.get(segment.name)
+            if value is None:
+                write(segment.source)
+            elif isinstance(value, str):
+                write(value)
+            else:
+                value.write_html(sink)
+
+
+def load_template(path):
+    """
+    Loads and compiles a template file, reusing the compiled template while neither the file nor any of its
+    partials changed.
+
+    Args:
+        path (str): The path to the template file.
+
+    Returns:
+        Template: The compiled template, with the template and partial paths in its `dependencies`.
+
+    Raises:
+        OSError: If the template or one of its partials cannot be read.
+        ValueError: If a partial includes itself.
+
+    A "{{> header.html }}" partial is replaced by the contents of header.html, resolved relative to the
+    directory of the file containing it, before the placeholders are compiled. Partials may include other
+    partials.
+    """
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == _mtimes(cached[1].dependencies):
+        return cached[1]
+    dependencies = [path]
+    with open(path, encoding="utf-8") as template_file:
+        text = _expand_partials(template_file.read(), os.path.dirname(path), dependencies, (path,))
+    template = Template.compile(text)
+    template.dependencies = dependencies
+    _template_cache[path] = (_mtimes(dependencies), template)
+    return template
+
+
+def _expand_partials(text, directory, dependencies, including):
+    """
+    Replaces the partials in a template source with their expanded contents.
+
+    Args:
+        text (str): The template source.
+        directory (str): The directory partial paths are relative to.
+        dependencies (list): The list the path of every included partial is appended to.
+        including (tuple): The paths of the files currently being expanded, used to detect cycles.
+
+    Returns:
+        str: The template source without partials.
+    """
+    def include(match):
+        partial_path = os.path.normpath(os.path.join(directory, match.group(1)))
+        if partial_path in including:
+            raise ValueError(f"Partial '{partial_path}' includes itself")
+        if partial_path not in dependencies:
+            dependencies.append(partial_path)
+        with open(partial_path, encoding="utf-8") as partial_file:
+            partial = partial_file.read()
+        return _expand_partials(partial, os.path.dirname(partial_path), dependencies, including + (partial_path,))
+
+    return PARTIAL_PATTERN.sub(include, text)
+
+
+def _mtimes(paths):
+    """
+    Returns:
+        tuple: The modification times of the given files, with None for files that no longer exist.
+    """
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+from unittest import mock
+import benchmark
+from benchmark import BUILD_STAGES, compare_to_baseline, main
+from site_test_case import SiteTestCase
+
+SMALL_SITE = ["--pages", "3", "--page-size", "500", "--static-files", "2", "--static-size-kb", "1", "--repeat", "1"]
+
+
+class TestBenchmark(SiteTestCase):
+    def run_main(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            status = main(list(argv))
+        return status, output.getvalue()
+
+    def test_compare_to_baseline(self):
+        results = {"stages": {"read": 0.3, "write": 0.1, "to_html": 0.2}, "total": 0.6, "end_to_end": 0.5}
+        baseline = {"stages": {"read": 0.2, "write": 0.1, "to_html": 0.0}, "total": 0.4}
+        comparison = {name: (before, seconds, regressed) for name, before, seconds, _, regressed in
+                      compare_to_baseline(results, baseline)}
+        # Stages missing from the baseline, or too fast to compare with, are left out
+        self.assertEqual(comparison, {
+            "read": (0.2, 0.3, True),
+            "write": (0.1, 0.1, False),
+            "total": (0.4, 0.6, True),
+        })
+        self.assertFalse(any(regressed for *_, regressed in compare_to_baseline(results, baseline, threshold=2)))
+
+    def test_build_against_baseline(self):
+        baseline_path = self.path("baseline.json")
+        status, output = self.run_main("build", *SMALL_SITE, "--output", baseline_path)
+        self.assertEqual(status, 0)
+        self.assertIn("Synthetic site: 3 pages", output)
+        with open(baseline_path, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        self.assertEqual(set(baseline["stages"]), set(BUILD_STAGES))
+
+        # A baseline ten times as fast as any build makes every stage a regression
+        for stage in baseline["stages"]:
+            baseline["stages"][stage] /= 10
+        baseline["total"] /= 10
+        with open(baseline_path, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file)
+        status, output = self.run_main("build", *SMALL_SITE, "--baseline", baseline_path, "--json")
+        self.assertEqual(status, 1)
+        self.assertIn("total", [row["stage"] for row in json.loads(output)["baseline"] if row["regressed"]])
+
+    def test_corpus_and_memory(self):
+        status, output = self.run_main("corpus", self.path("site"), "--pages", "3", "--static-files", "1")
+        self.assertEqual(status, 0)
+        self.assertEqual(len(os.listdir(self.path("site/static"))), 1)
+
+        # The peak RSS is left out where the resource module is missing, as on Windows
+        with mock.patch.object(benchmark, "resource", None):
+            status, output = self.run_main("memory", "--size-mb", "0.01")
+        self.assertEqual(status, 0)
+        self.assertIn("HTML tree", output)
+        self.assertNotIn("Peak RSS", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import gzip
+import os
+import tempfile
+import unittest
+from compress import accepted_encodings, compress_outputs, precompressed_variant, preferred_encoding
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.write("index.html", "<p>Hello</p>" * 100)
+        self.write("tiny.css", "body {}")
+        self.write("logo.png", "png" * 100)
+
+    def write(self, name, content):
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as output_file:
+            output_file.write(content)
+
+    def compress(self, paths=None, assets=()):
+        return compress_outputs(self.directory, paths, workers=2, assets=assets)
+
+    def test_compress_outputs(self):
+        counts = self.compress()
+        self.assertEqual(counts["removed"], 0)
+        self.assertEqual(sorted(os.listdir(self.directory))[:3], ["index.html", "index.html.gz", "logo.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "tiny.css.gz")))
+        with gzip.open(os.path.join(self.directory, "index.html.gz"), "rt", encoding="utf-8") as gz_file:
+            self.assertEqual(gz_file.read(), "<p>Hello</p>" * 100)
+
+        self.assertEqual(self.compress()["compressed"], 0)
+        os.remove(os.path.join(self.directory, "index.html"))
+        self.assertEqual(self.compress(["index.html"])["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "index.html.gz")))
+
+    def test_shipped_archives(self):
+        os.makedirs(os.path.join(self.directory, "downloads"))
+        archive = os.path.join("downloads", "site.tar.gz")
+        assets = {archive, "data.json", "data.json.gz"}
+        for name in assets:
+            self.write(name, "{}" * 200)
+        # Without the manifest, the archive is still kept since a .tar is not a compressible type
+        self.assertEqual(self.compress()["removed"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, archive)))
+        self.write("data.json.gz", "{}" * 200)
+
+        os.remove(os.path.join(self.directory, "data.json"))
+        self.assertEqual(self.compress(["data.json", "data.json.gz"], assets=assets)["removed"], 0)
+        with open(os.path.join(self.directory, "data.json.gz"), encoding="utf-8") as shipped_file:
+            self.assertEqual(shipped_file.read(), "{}" * 200)
+
+    def test_negotiation(self):
+        self.compress()
+        self.assertEqual(accepted_encodings("gzip, deflate;q=0.5, br;q=0"), {"gzip": 1.0, "deflate": 0.5})
+        self.assertEqual(accepted_encodings(None), {})
+        path = os.path.join(self.directory, "index.html")
+        self.assertEqual(precompressed_variant(path, "gzip, br"), (f"{path}.gz", "gzip"))
+        self.assertIsNone(precompressed_variant(path, "gzip;q=0"))
+
+        # The highest q-value wins, then the order of preference of the server
+        self.assertEqual(preferred_encoding("br;q=0.1, gzip;q=1", ["br", "gzip"]), "gzip")
+        self.assertEqual(preferred_encoding("gzip, br", ["br", "gzip"]), "br")
+        self.assertEqual(preferred_encoding("*;q=0.5, gzip;q=0.2", ["br", "gzip"]), "br")
+        self.assertEqual(preferred_encoding("*, br;q=0", ["br", "gzip"]), "gzip")
+        self.assertIsNone(preferred_encoding("deflate", ["br", "gzip"]))
+        self.assertIsNone(preferred_encoding(None, ["br", "gzip"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
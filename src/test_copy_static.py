@@ -0,0 +1,96 @@
+import errno
+import os
+import tempfile
+import unittest
+from unittest import mock
+import copy_static
+from copy_static import COPY_STRATEGIES, copy_file, sync_files_recursive
+from manifest import Manifest, hash_file
+
+
+class TestCopyStatic(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, "static")
+        self.dest = os.path.join(directory.name, "public")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write("index.css", "body {}")
+        self.write("images/logo.png", "png")
+        self.manifest = Manifest(os.path.join(directory.name, "manifest.json"))
+
+    def write(self, name, content):
+        with open(os.path.join(self.source, name), "w", encoding="utf-8") as source_file:
+            source_file.write(content)
+
+    def sync(self, **kwargs):
+        return sync_files_recursive(self.source, self.dest, self.manifest, **kwargs)
+
+    def test_sync(self):
+        # Hardlinked files would see the edit below without being copied again
+        self.assertEqual(self.sync(strategy="copy"), {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.sync(strategy="copy"), {"copied": 0, "unchanged": 2, "removed": 0})
+
+        os.remove(os.path.join(self.source, "images/logo.png"))
+        self.write("index.css", "body { color: red; }")
+        self.assertEqual(self.sync(strategy="copy"), {"copied": 1, "unchanged": 0, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images/logo.png")))
+        with open(os.path.join(self.dest, "index.css"), encoding="utf-8") as dest_file:
+            self.assertEqual(dest_file.read(), "body { color: red; }")
+
+    def test_sync_checksum(self):
+        self.sync(strategy="copy")
+        dest_path = os.path.join(self.dest, "index.css")
+        published = os.stat(dest_path).st_mtime_ns
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        with mock.patch("copy_static.hash_file", wraps=hash_file) as hashed:
+            self.assertEqual(self.sync(strategy="copy", checksum=True)["unchanged"], 2)
+            self.assertEqual(hashed.call_count, 2)
+            # The published file may be shared with the live generation, so it is left as it is
+            self.assertEqual(os.stat(dest_path).st_mtime_ns, published)
+            self.assertEqual(self.sync(strategy="copy", checksum=True)["unchanged"], 2)
+            self.assertEqual(hashed.call_count, 2)
+
+    def test_copy_strategies(self):
+        os.makedirs(self.dest)
+        from_path = os.path.join(self.source, "index.css")
+        for strategy in ("auto",) + COPY_STRATEGIES:
+            dest_path = os.path.join(self.dest, f"{strategy}.css")
+            used = copy_file(from_path, dest_path, strategy)
+            self.assertIn(used, COPY_STRATEGIES)
+            with open(dest_path, encoding="utf-8") as dest_file:
+                self.assertEqual(dest_file.read(), "body {}")
+            self.assertEqual(os.stat(dest_path).st_mtime_ns, os.stat(from_path).st_mtime_ns)
+            if strategy == "auto":
+                self.assertNotEqual(used, "hardlink")
+                self.assertFalse(os.path.samefile(dest_path, from_path))
+
+    def test_copy_file_fallbacks(self):
+        os.makedirs(self.dest)
+        from_path = os.path.join(self.source, "index.css")
+        dest_path = os.path.join(self.dest, "index.css")
+        # A static file named like a temporary file is not clobbered by the copy next to it
+        with open(f"{dest_path}.tmp", "w", encoding="utf-8") as tmp_file:
+            tmp_file.write("kept")
+        devices = (os.stat(from_path).st_dev, os.stat(self.dest).st_dev)
+
+        def refuse(code):
+            def copy(from_path, tmp_path):
+                raise OSError(code, os.strerror(code))
+            return copy
+
+        with mock.patch.object(copy_static, "_unsupported", set()) as unsupported:
+            # A permission error only concerns the one file, so the strategy is tried again for the next
+            with mock.patch.dict(copy_static._COPY_FUNCTIONS, reflink=refuse(errno.EPERM)):
+                self.assertNotEqual(copy_file(from_path, dest_path), "reflink")
+            self.assertNotIn(("reflink", *devices), unsupported)
+            with mock.patch.dict(copy_static._COPY_FUNCTIONS, reflink=refuse(errno.EXDEV)):
+                copy_file(from_path, dest_path)
+            self.assertIn(("reflink", *devices), unsupported)
+        self.assertEqual(sorted(os.listdir(self.dest)), ["index.css", "index.css.tmp"])
+        with open(f"{dest_path}.tmp", encoding="utf-8") as tmp_file:
+            self.assertEqual(tmp_file.read(), "kept")
+
+
+if __name__ == "__main__":
+    unittest.main()
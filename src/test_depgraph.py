@@ -0,0 +1,55 @@
+import unittest
+from depgraph import DependencyGraph
+from generate import generate_pages_recursive
+from manifest import Manifest
+from site_test_case import SiteTestCase
+
+
+class TestDependencyGraph(SiteTestCase):
+    def test_affected(self):
+        self.write("template.html", "{{ Content }}")
+        self.write("logo.png", "png")
+        graph = DependencyGraph()
+        graph.set_inputs("a.md", [self.path("template.html")])
+        graph.set_inputs("b.md", [self.path("template.html"), self.path("logo.png")])
+        self.assertEqual(graph.changed_inputs(), set())
+        self.assertEqual(graph.affected([self.path("logo.png")]), {"b.md"})
+
+        self.write("logo.png", "gif")
+        changed = graph.changed_inputs()
+        self.assertEqual(changed, {self.path("logo.png")})
+        self.assertEqual(graph.affected(changed), {"b.md"})
+
+        graph.remove_page("b.md")
+        self.assertNotIn(self.path("logo.png"), graph.fingerprints)
+        restored = DependencyGraph.from_dict(graph.to_dict())
+        self.assertEqual(restored.affected([self.path("template.html")]), {"a.md"})
+
+    def test_incremental_build(self):
+        self.write("template.html", "{{> header.html }}<article>{{ Content }}</article>")
+        self.write("header.html", "<h1>{{ Title }}</h1>")
+        self.write("static/logo.png", "png")
+        self.write("content/index.md", "# Home")
+        self.write("content/logo.md", "# Logo\n\n![logo](/logo.png)")
+        manifest = Manifest(self.path("manifest.json"))
+
+        def build():
+            with self.assertLogs("site", level="INFO") as logs:
+                generate_pages_recursive(
+                    self.path("content"), self.path("template.html"), self.path("public"),
+                    manifest, static_dir=self.path("static"),
+                )
+            return logs.records[-1].getMessage()
+
+        self.assertEqual(build(), "2 of 2 pages generated, 0 unchanged")
+        self.assertEqual(build(), "0 of 2 pages generated, 2 unchanged")
+        self.write("static/logo.png", "gif")
+        self.assertEqual(build(), "1 of 2 pages generated, 1 unchanged")
+        self.write("header.html", "<h2>{{ Title }}</h2>")
+        self.assertEqual(build(), "2 of 2 pages generated, 0 unchanged")
+        with open(self.path("public/index.html"), encoding="utf-8") as page_file:
+            self.assertEqual(page_file.read(), "<h2>Home</h2><article><div><h1>Home</h1></div></article>")
+
+
+if __name__ == "__main__":
+    unittest.main()
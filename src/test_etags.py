@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+from etags import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, cache_control, load_etags, write_etags
+from manifest import hash_file
+
+
+class TestETags(unittest.TestCase):
+    def test_write_etags(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "majesty"))
+            for name in ("index.html", "majesty/index.html"):
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as site_file:
+                    site_file.write(name)
+            self.assertEqual(write_etags(directory), {"hashed": 2, "reused": 0})
+            self.assertEqual(write_etags(directory), {"hashed": 0, "reused": 2})
+            etags = load_etags(directory)
+            self.assertEqual(sorted(etags), ["index.html", "majesty/index.html"])
+            self.assertEqual(etags["index.html"], f'"{hash_file(os.path.join(directory, "index.html"))[:32]}"')
+
+            with open(os.path.join(directory, "index.html"), "a", encoding="utf-8") as site_file:
+                site_file.write(" changed")
+            os.remove(os.path.join(directory, "majesty", "index.html"))
+            counts = write_etags(directory, ["index.html", os.path.join("majesty", "index.html")])
+            self.assertEqual(counts, {"hashed": 1, "reused": 0})
+            etags = load_etags(directory)
+            self.assertEqual(etags, {"index.html": f'"{hash_file(os.path.join(directory, "index.html"))[:32]}"'})
+
+    def test_cache_control(self):
+        self.assertEqual(cache_control("index.css"), REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(cache_control("majesty/index.html"), REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(cache_control("assets/app.3f2a9c1b.css"), IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(cache_control("images/logo-3f2a9c1b5d.png.gz"), IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(cache_control("changelog-20240115.html"), REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(cache_control("downloads/report-20240115.pdf"), REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(cache_control("blog/post-3f2a9c1b.html"), REVALIDATE_CACHE_CONTROL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+import generate
+from generate import (
+    extract_title, extract_title_from_buffer, find_pages, generate_page, generate_pages_recursive, render_pages,
+)
+from manifest import Manifest
+from site_test_case import SiteTestCase
+
+
+class TestGenerate(unittest.TestCase):
+    def test_extract_title_streamed(self):
+        for markdown in (
+            "# Title",
+            "Intro\n\n## Section\n\n# Title\n\ntext",
+            "#\n\n  \nTitle on a later line\n",
+            "#Not a title\n#  \n# Title",
+        ):
+            self.assertEqual(extract_title_from_buffer(markdown.encode()), extract_title(markdown))
+            for newline in ("\r\n", "\r"):
+                buffer = markdown.replace("\n", newline).encode()
+                self.assertEqual(extract_title_from_buffer(buffer), extract_title(markdown))
+        for markdown in ("No title", "## Section\n#\n\n"):
+            with self.assertRaises(ValueError):
+                extract_title_from_buffer(markdown.encode())
+
+    def test_streamed_page(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "static"))
+            with open(os.path.join(directory, "static", "logo.png"), "w", encoding="utf-8") as static_file:
+                static_file.write("png")
+            source_path = os.path.join(directory, "index.md")
+            template_path = os.path.join(directory, "template.html")
+            with open(source_path, "w", encoding="utf-8") as source_file:
+                source_file.write("Intro\n\n# Title\n\n![logo](/logo.png)\n\n\n* one\n* two\n\n> quote")
+            with open(template_path, "w", encoding="utf-8") as template_file:
+                template_file.write("<title>{{ Title }}</title>{{ Content }}")
+
+            pages = []
+            for threshold in (generate.STREAM_THRESHOLD, 0):
+                dest_path = os.path.join(directory, f"{threshold}.html")
+                dependencies = set()
+                generate.STREAM_THRESHOLD, saved = threshold, generate.STREAM_THRESHOLD
+                try:
+                    self.assertTrue(
+                        generate_page(
+                            source_path, template_path, dest_path, dependencies=dependencies,
+                            static_dir=os.path.join(directory, "static"),
+                        )
+                    )
+                finally:
+                    generate.STREAM_THRESHOLD = saved
+                with open(dest_path, encoding="utf-8") as page_file:
+                    pages.append((page_file.read(), dependencies))
+            self.assertEqual(pages[0], pages[1])
+            self.assertIn(os.path.join(directory, "static", "logo.png"), pages[1][1])
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+
+    def build(self):
+        # Every build starts from the saved manifest, as `main.py --incremental` does
+        manifest = Manifest.load(self.path("manifest.json"))
+        with self.assertLogs("site", level="INFO") as logs:
+            generate_pages_recursive(self.path("content"), self.path("template.html"), self.path("public"), manifest)
+        manifest.save()
+        return logs.records[-1].getMessage()
+
+    def mtime(self, name):
+        return os.stat(self.path(os.path.join("public", name))).st_mtime_ns
+
+    def test_skips_unchanged_pages(self):
+        self.assertEqual(self.build(), "2 of 2 pages generated, 0 unchanged")
+        written = self.mtime("index.html")
+        self.assertEqual(self.build(), "0 of 2 pages generated, 2 unchanged")
+        self.assertEqual(self.mtime("index.html"), written)
+
+        # A missing output is regenerated even though its source did not change
+        os.remove(self.path("public/blog/post.html"))
+        self.assertEqual(self.build(), "1 of 2 pages generated, 1 unchanged")
+        self.assertTrue(os.path.exists(self.path("public/blog/post.html")))
+
+    def test_rerenders_changed_sources_and_template(self):
+        self.build()
+        self.write("content/index.md", "# Welcome")
+        self.assertEqual(self.build(), "1 of 2 pages generated, 1 unchanged")
+        with open(self.path("public/index.html"), encoding="utf-8") as page_file:
+            self.assertEqual(page_file.read(), "<title>Welcome</title><div><h1>Welcome</h1></div>")
+
+        self.write("template.html", "<h1>{{ Title }}</h1>")
+        self.assertEqual(self.build(), "2 of 2 pages generated, 0 unchanged")
+        with open(self.path("public/blog/post.html"), encoding="utf-8") as page_file:
+            self.assertEqual(page_file.read(), "<h1>Post</h1>")
+
+    def test_prunes_deleted_pages(self):
+        self.build()
+        os.remove(self.path("content/blog/post.md"))
+        self.assertEqual(self.build(), "0 of 1 pages generated, 1 unchanged")
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+        self.assertEqual(list(Manifest.load(self.path("manifest.json")).pages), [self.path("content/index.md")])
+
+
+class TestRenderPages(SiteTestCase):
+    def test_parallel_matches_serial(self):
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/logo.png", "png")
+        for number in range(6):
+            # The page without a title fails without stopping the others
+            markdown = "No title" if number == 3 else f"# Page {number}\n\n![logo](/logo.png)"
+            self.write(f"content/page{number}.md", markdown)
+
+        runs = []
+        for jobs in (1, 2):
+            pages = find_pages(self.path("content"), self.path(f"public{jobs}"))
+            with self.assertLogs("site", level="DEBUG") as logs:
+                results = render_pages(pages, self.path("template.html"), jobs, static_dir=self.path("static"))
+            records = [(record.levelname, getattr(record, "page", None)) for record in logs.records]
+            runs.append((results, records))
+            self.assertEqual(len(results), 6)
+            self.assertIsNone(results[3])
+            for number in (0, 1, 2, 4, 5):
+                self.assertIn(self.path("static/logo.png"), results[number])
+                self.assertTrue(os.path.exists(self.path(f"public{jobs}/page{number}.html")))
+            self.assertEqual(logs.records[-1].failed, [self.path("content/page3.md")])
+        # The workers' records are replayed in page order, so the parallel log reads like the serial one
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(
+            [page for level, page in runs[1][1] if level == "DEBUG" and page is not None],
+            [self.path(f"content/page{number}.md") for number in (0, 1, 2, 4, 5)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -67,6 +68,34 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                ParentNode("a", [LeafNode(None, "link")], {"href": "https://boot.dev"}),
+            ],
+        )
+        sink = io.StringIO()
+        node.write_html(sink)
+        self.assertEqual(sink.getvalue(), node.to_html())
+        self.assertEqual(
+            sink.getvalue(),
+            '<div><p><b>Bold text</b>Normal text</p><a href="https://boot.dev">link</a></div>',
+        )
+
+    def test_iter_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)])
+        self.assertEqual(
+            list(node.iter_html()),
+            ["<ul>", "<li>", "0", "</li>", "<li>", "1", "</li>", "<li>", "2", "</li>", "</ul>"],
+        )
+
+    def test_to_html_no_children_raises(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -186,6 +186,88 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_matches_split_passes(self):
+        text = (
+            "**Bold** then *italic* and `code`, an ![image](https://i.imgur.com/zjjcJKZ.png)"
+            " a [link](https://boot.dev) and ![another](https://example.com/a.png)[second link](/b)"
+        )
+        nodes = [TextNode(text, text_type_text)]
+        nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
+        nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
+        nodes = split_nodes_delimiter(nodes, "`", text_type_code)
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_link(nodes)
+        self.assertListEqual(nodes, text_to_textnodes(text))
+
+    def test_text_to_textnodes_nested_delimiter(self):
+        nodes = text_to_textnodes("**bold *not italic* here** and `a * b`")
+        self.assertListEqual(
+            [
+                TextNode("bold *not italic* here", text_type_bold),
+                TextNode(" and ", text_type_text),
+                TextNode("a * b", text_type_code),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed bold")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is *italic** text")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is `unclosed code")
+
+    def test_split_matches_old_splitter(self):
+        texts = [
+            "no markup at all",
+            "[link](https://boot.dev)",
+            "see [one](https://a.dev) and [two](https://b.dev) then text",
+            "![image](https://i.imgur.com/zjjcJKZ.png) and ![other](/b.png)",
+            "mixed ![image](/a.png) with [link](/b) and [](/empty) ()",
+            "repeated [same](/x) and [same](/x) again",
+            "[unclosed](link and ![also unclosed",
+            "see [link](https://boot.dev) " * 200,
+        ]
+        for split, old_split in ((split_nodes_link, old_split_nodes_link), (split_nodes_image, old_split_nodes_image)):
+            for text in texts:
+                nodes = [TextNode("**bold**", text_type_bold), TextNode(text, text_type_text)]
+                self.assertListEqual(split(nodes), old_split(nodes), text)
+            # Nodes without matches are passed through rather than copied
+            node = TextNode("no markup at all", text_type_text)
+            self.assertIs(split([node])[0], node)
+
+
+def old_split_nodes(old_nodes, extract, markdown, text_type):
+    # The splitter replaced by the single-pass one, which split the remaining text once per match
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != text_type_text:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        matches = extract(original_text)
+        if len(matches) == 0:
+            new_nodes.append(old_node)
+            continue
+        for text, url in matches:
+            sections = original_text.split(markdown.format(text, url), 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], text_type_text))
+            new_nodes.append(TextNode(text, text_type, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, text_type_text))
+    return new_nodes
+
+
+def old_split_nodes_image(old_nodes):
+    return old_split_nodes(old_nodes, extract_markdown_images, "![{}]({})", text_type_image)
+
+
+def old_split_nodes_link(old_nodes):
+    return old_split_nodes(old_nodes, extract_markdown_links, "[{}]({})", text_type_link)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+from livereload import CLIENT_SCRIPT, LiveReloadHub, inject_client, page_for_url
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_inject_client(self):
+        self.assertEqual(inject_client(b"<body><p>x</p></BODY>"), b"<body><p>x</p>" + CLIENT_SCRIPT + b"</BODY>")
+        self.assertEqual(inject_client(b"<p>x</p>"), b"<p>x</p>" + CLIENT_SCRIPT)
+
+    def test_page_for_url(self):
+        self.assertEqual(page_for_url("/"), "index.html")
+        self.assertEqual(page_for_url("/majesty/"), "majesty/index.html")
+        self.assertEqual(page_for_url("/majesty"), "majesty/index.html")
+        self.assertEqual(page_for_url("/about.html"), "about.html")
+        self.assertEqual(page_for_url("/../secret/"), "secret/index.html")
+
+    def test_notify_only_viewers(self):
+        async def run():
+            hub = LiveReloadHub()
+            home = hub.subscribe("index.html")
+            majesty = hub.subscribe("majesty/index.html")
+            hub.notify(["majesty/index.html"])
+            self.assertEqual(await asyncio.wait_for(majesty.get(), 1), "majesty/index.html")
+            self.assertTrue(home.empty())
+
+            hub.notify(["index.css"])
+            self.assertEqual(await asyncio.wait_for(home.get(), 1), "css:index.css")
+            self.assertEqual(await asyncio.wait_for(majesty.get(), 1), "css:index.css")
+
+            hub.unsubscribe("index.html", home)
+            self.assertEqual(list(hub.clients), ["majesty/index.html"])
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
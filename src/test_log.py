@@ -0,0 +1,43 @@
+import json
+import logging
+import unittest
+from io import StringIO
+from log import LOGGER_NAME, capture_logs, configure_logging, get_logger, replay_logs
+
+
+class TestLog(unittest.TestCase):
+    def tearDown(self):
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.handlers = []
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
+
+    def test_json_output(self):
+        stream = StringIO()
+        listener = configure_logging("summary", json_output=True, stream=stream)
+        logger = get_logger("generate")
+        logger.debug("Generated %s", "index.html")
+        logger.info("%d of %d pages generated", 1, 2, extra={"generated": 1, "pages": 2})
+        logger.error("Unable to read file '%s'", "a.md", extra={"page": "a.md"})
+        listener.stop()
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([entry["level"] for entry in entries], ["info", "error"])
+        self.assertEqual(entries[0]["message"], "1 of 2 pages generated")
+        self.assertEqual(entries[0]["logger"], "site.generate")
+        self.assertEqual((entries[0]["generated"], entries[0]["pages"]), (1, 2))
+        self.assertEqual(entries[1]["page"], "a.md")
+
+    def test_text_output_and_replay(self):
+        with capture_logs(logging.DEBUG) as records:
+            get_logger("generate").debug("Generated %s", "index.html")
+            get_logger("generate").warning("Missing %s", "title")
+        stream = StringIO()
+        listener = configure_logging("verbose", stream=stream)
+        replay_logs(records)
+        listener.stop()
+        self.assertEqual(stream.getvalue(), "Generated index.html\nWarning: Missing title\n")
+        self.assertFalse(logging.getLogger(LOGGER_NAME).propagate)
+
+
+if __name__ == "__main__":
+    unittest.main()
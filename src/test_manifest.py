@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+from manifest import MANIFEST_VERSION, Manifest, hash_file
+from site_test_case import SiteTestCase
+
+
+class TestManifest(SiteTestCase):
+    def record(self, manifest, name, dest):
+        path = self.path(name)
+        source_hash, stat = manifest.source_hash(path)
+        manifest.record(path, dest, source_hash, stat)
+        return path
+
+    def test_round_trip(self):
+        self.write("index.md", "# Home")
+        manifest = Manifest(self.path(".build/manifest.json"))
+        source_path = self.record(manifest, "index.md", "index.html")
+        manifest.assets = {"logo.png"}
+        manifest.graph.set_inputs(source_path, [self.path("index.md")])
+        manifest.compressed = False
+        manifest.save()
+
+        loaded = Manifest.load(self.path(".build/manifest.json"))
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertEqual(loaded.pages[source_path]["hash"], hash_file(source_path))
+        self.assertEqual(loaded.assets, {"logo.png"})
+        self.assertEqual(loaded.graph.inputs, manifest.graph.inputs)
+        self.assertFalse(loaded.compressed)
+        self.assertFalse(os.path.exists(self.path(".build/manifest.json.tmp")))
+
+    def test_load_unusable(self):
+        self.assertEqual(Manifest.load(self.path("missing.json")).pages, {})
+        self.write("corrupt.json", "{")
+        self.assertEqual(Manifest.load(self.path("corrupt.json")).pages, {})
+        self.write("old.json", json.dumps({"version": MANIFEST_VERSION - 1, "pages": {"index.md": {}}}))
+        old = Manifest.load(self.path("old.json"))
+        self.assertEqual((old.pages, old.assets), ({}, set()))
+
+    def test_freshness(self):
+        self.write("index.md", "# Home")
+        manifest = Manifest(self.path("manifest.json"))
+        source_path = self.record(manifest, "index.md", "index.html")
+        source_hash, _ = manifest.source_hash(source_path)
+        self.assertTrue(manifest.is_fresh(source_path, "index.html", source_hash))
+        self.assertFalse(manifest.is_fresh(source_path, "home.html", source_hash))
+
+        # The recorded hash is only reused while the size and modification time match
+        self.write("index.md", "# Away")
+        source_hash, _ = manifest.source_hash(source_path)
+        self.assertEqual(source_hash, hash_file(source_path))
+        self.assertFalse(manifest.is_fresh(source_path, "index.html", source_hash))
+
+        manifest.forget(source_path)
+        self.assertNotIn(source_path, manifest.pages)
+
+    def test_prune(self):
+        for name in ("index.md", "blog/post.md"):
+            self.write(name, "# Page")
+        self.write("public/index.html", "<p>Home</p>")
+        self.write("public/blog/post.html", "<p>Post</p>")
+        manifest = Manifest(self.path("manifest.json"))
+        kept = self.record(manifest, "index.md", "index.html")
+        deleted = self.record(manifest, "blog/post.md", os.path.join("blog", "post.html"))
+
+        # Only the pages found by this build are seen
+        manifest.seen = {kept}
+        self.assertEqual(manifest.prune(self.path("public")), [self.path("public/blog/post.html")])
+        self.assertEqual(list(manifest.pages), [kept])
+        self.assertNotIn(deleted, manifest.graph.inputs)
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+        self.assertTrue(os.path.exists(self.path("public/index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
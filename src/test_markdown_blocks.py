@@ -1,5 +1,7 @@
 import unittest
 from markdown_blocks import (
+    blocks_to_html_node,
+    iter_buffer_blocks,
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
@@ -9,6 +11,7 @@ from markdown_blocks import (
     block_type_olist,
     block_type_ulist,
     block_type_quote,
+    block_type_image,
 )
 
 
@@ -70,6 +73,24 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), block_type_paragraph)
 
+    def test_block_to_block_types_edge_cases(self):
+        block = "####### too deep"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "- dash\n- list"
+        self.assertEqual(block_to_block_type(block), block_type_ulist)
+        block = ">no space"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "![alt](/images/rivendell.png)"
+        self.assertEqual(block_to_block_type(block), block_type_image)
+        block = "\n".join(f"{i}. item" for i in range(1, 12))
+        self.assertEqual(block_to_block_type(block), block_type_olist)
+        block = "1. list\n3. skips a number"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "1.no space"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+        block = "```\nunclosed"
+        self.assertEqual(block_to_block_type(block), block_type_paragraph)
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -153,6 +174,19 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_blocks_to_html_node(self):
+        md = "\n\n# Title \n\n\n  Some text\n  \n\nmore\n\n\n\n\n* one\n* two\n\n   \n\n```\ncode\n```\n\nend"
+        html = blocks_to_html_node(iter_buffer_blocks(md.encode(), window=8)).to_html()
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+
+    def test_iter_buffer_blocks(self):
+        md = "\n\n# Tïtle \n\n\n  Sôme text\n  \n\nmore\n\n\n\n\n* one\n* two\n\n   \n\nend\n\n\n"
+        for window in (1, 2, 3, 7, 64 << 10):
+            self.assertEqual(list(iter_buffer_blocks(md.encode(), window=window)), markdown_to_blocks(md))
+            for newline in ("\r\n", "\r"):
+                buffer = md.replace("\n", newline).encode()
+                self.assertEqual(list(iter_buffer_blocks(buffer, window=window)), markdown_to_blocks(md))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
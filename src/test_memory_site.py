@@ -0,0 +1,97 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from etags import load_etags, write_etags
+from memory_site import InMemorySite
+
+
+def request(app, path, method="GET", headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    asyncio.run(app(scope, receive, send))
+    return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+
+class TestInMemorySite(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.public = os.path.join(self.directory, "public")
+        self.generation(os.path.join(self.directory, "one"), "<p>one</p>")
+        os.symlink(os.path.join(self.directory, "one"), self.public)
+        self.site = InMemorySite(self.public)
+
+    def generation(self, path, html):
+        os.makedirs(os.path.join(path, "majesty"))
+        for name, content in (("index.html", html), ("majesty/index.html", "<p>majesty</p>"), ("index.css", "body {}")):
+            with open(os.path.join(path, name), "w", encoding="utf-8") as site_file:
+                site_file.write(content)
+
+    def test_routes(self):
+        status, headers, body = request(self.site, "/")
+        self.assertEqual((status, body), (200, b"<p>one</p>"))
+        self.assertEqual(headers[b"content-type"], b"text/html; charset=utf-8")
+        self.assertEqual(request(self.site, "/majesty/")[2], b"<p>majesty</p>")
+        self.assertEqual(request(self.site, "/majesty/index.html")[2], b"<p>majesty</p>")
+        status, headers, _ = request(self.site, "/majesty")
+        self.assertEqual((status, headers[b"location"]), (307, b"/majesty/"))
+        self.assertEqual(request(self.site, "/missing.html")[0], 404)
+        self.assertEqual(request(self.site, "/index.css", method="HEAD")[2], b"")
+        self.assertEqual(request(self.site, "/", method="POST")[0], 405)
+
+    def test_etag(self):
+        _, headers, _ = request(self.site, "/index.css")
+        status, _, body = request(self.site, "/index.css", headers=[(b"if-none-match", headers[b"etag"])])
+        self.assertEqual((status, body), (304, b""))
+
+    def test_build_etags(self):
+        write_etags(self.public)
+        self.site.load()
+        self.assertEqual(request(self.site, "/.etags.json")[0], 404)
+        _, headers, _ = request(self.site, "/index.css")
+        self.assertEqual(headers[b"etag"], load_etags(self.public)["index.css"].encode())
+        self.assertEqual(headers[b"cache-control"], b"no-cache")
+        conditional = [(b"if-none-match", b'"other", W/' + headers[b"etag"])]
+        status, not_modified, _ = request(self.site, "/index.css", headers=conditional)
+        self.assertEqual((status, not_modified[b"etag"]), (304, headers[b"etag"]))
+        status, _, _ = request(self.site, "/index.css", headers=[(b"if-modified-since", headers[b"last-modified"])])
+        self.assertEqual(status, 304)
+
+    def test_precompressed_variant(self):
+        with open(os.path.join(self.public, "index.css.gz"), "wb") as site_file:
+            site_file.write(b"gzipped")
+        self.site.load()
+        status, headers, body = request(self.site, "/index.css", headers=[(b"accept-encoding", b"br, gzip")])
+        self.assertEqual((status, headers[b"content-encoding"], body), (200, b"gzip", b"gzipped"))
+        status, headers, body = request(self.site, "/index.css")
+        self.assertEqual((headers[b"vary"], body), (b"Accept-Encoding", b"body {}"))
+        self.assertNotIn(b"content-encoding", headers)
+
+    def test_swap_generation(self):
+        self.generation(os.path.join(self.directory, "two"), "<p>two</p>")
+        os.symlink(os.path.join(self.directory, "two"), os.path.join(self.directory, "link"))
+        os.replace(os.path.join(self.directory, "link"), self.public)
+        self.assertEqual(request(self.site, "/")[2], b"<p>one</p>")
+        self.site.load()
+        self.assertEqual(request(self.site, "/")[2], b"<p>two</p>")
+
+    def test_update(self):
+        with open(os.path.join(self.public, "index.html"), "w", encoding="utf-8") as site_file:
+            site_file.write("<p>edited</p>")
+        os.remove(os.path.join(self.public, "index.css"))
+        self.site.update(["index.html", "index.css"])
+        self.assertEqual(request(self.site, "/")[2], b"<p>edited</p>")
+        self.assertEqual(request(self.site, "/index.css")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import markdown_blocks
+from generate import generate_page
+from profiler import PAGE_FRAME, BuildProfile
+
+
+class TestBuildProfile(unittest.TestCase):
+    def test_generate_page_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, "index.md")
+            template_path = os.path.join(directory, "template.html")
+            with open(source_path, "w", encoding="utf-8") as source_file:
+                source_file.write("# Title\n\nSome **bold** text\n\n* one\n* two")
+            with open(template_path, "w", encoding="utf-8") as template_file:
+                template_file.write("<title>{{ Title }}</title>{{ Content }}")
+            profile = BuildProfile()
+            self.assertTrue(generate_page(source_path, template_path, os.path.join(directory, "a.html")))
+            self.assertTrue(
+                generate_page(source_path, template_path, os.path.join(directory, "b.html"), profile=profile)
+            )
+            pages = []
+            for name in ("a.html", "b.html"):
+                with open(os.path.join(directory, name), encoding="utf-8") as page_file:
+                    pages.append(page_file.read())
+            self.assertEqual(pages[0], pages[1])
+            self.assertEqual(markdown_blocks.text_to_textnodes.__module__, "inline_markdown")
+
+            totals = profile.totals()
+            self.assertEqual(list(profile.pages), [source_path])
+            self.assertEqual(totals[(PAGE_FRAME, "parse", "block_to_html_node")][3], 3)
+            self.assertEqual(totals[(PAGE_FRAME, "parse", "block_to_html_node", "text_to_textnodes")][3], 4)
+            self.assertIn((PAGE_FRAME, "write"), totals)
+
+            with self.assertLogs("site.profiler", "INFO") as logs:
+                profile.report()
+            self.assertEqual(logs.output[0], "INFO:site.profiler:Slowest 1 of 1 pages:")
+            self.assertTrue(logs.output[1].endswith(source_path))
+            self.assertEqual(logs.records[1].page, source_path)
+
+    def test_merge_and_collapsed(self):
+        worker = BuildProfile()
+        with worker.page("index.md"), worker.stage("parse"):
+            pass
+        profile = BuildProfile()
+        with profile.stage("build"):
+            profile.merge(worker.to_dict())
+        self.assertEqual(profile.pages, worker.pages)
+        self.assertIn(("index.md", ("build", PAGE_FRAME, "parse")), profile.stages)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.folded")
+            profile.write_collapsed(path)
+            with open(path, encoding="utf-8") as dump_file:
+                for line in dump_file:
+                    frames, microseconds = line.rsplit(" ", 1)
+                    self.assertTrue(frames.startswith("build"))
+                    self.assertNotIn(PAGE_FRAME, frames)
+                    self.assertGreater(int(microseconds), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+from publish import current_generation, publish_generation, stage_generation
+from site_test_case import SiteTestCase
+
+
+class TestPublish(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = self.path("public")
+        self.generations = self.path("generations")
+
+    def publish(self, content, reuse=True):
+        staging = stage_generation(self.public, self.generations, reuse=reuse)
+        # Replaced rather than rewritten, as the build does, since the file is hardlinked with the previous generation
+        tmp_path = os.path.join(staging, "index.html.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as page_file:
+            page_file.write(content)
+        os.replace(tmp_path, os.path.join(staging, "index.html"))
+        publish_generation(self.public, staging, self.generations)
+        return staging
+
+    def read(self):
+        with open(os.path.join(self.public, "index.html"), encoding="utf-8") as page_file:
+            return page_file.read()
+
+    def test_symlink_flip(self):
+        self.assertIsNone(current_generation(self.public))
+        first = self.publish("first")
+        self.assertTrue(os.path.islink(self.public))
+        self.assertEqual(current_generation(self.public), os.path.realpath(first))
+        self.assertEqual(self.read(), "first")
+
+        second = self.publish("second")
+        self.assertEqual(current_generation(self.public), os.path.realpath(second))
+        self.assertEqual(self.read(), "second")
+        # The previous generation is kept for requests still reading from it
+        with open(os.path.join(first, "index.html"), encoding="utf-8") as page_file:
+            self.assertEqual(page_file.read(), "first")
+        self.assertFalse(os.path.lexists(f"{self.public}.tmp-link"))
+
+    def test_moves_legacy_directory_aside(self):
+        self.write("public/index.html", "legacy")
+        staging = self.publish("new", reuse=False)
+        self.assertTrue(os.path.islink(self.public))
+        self.assertEqual(self.read(), "new")
+        legacy = os.path.join(self.generations, "legacy")
+        self.assertEqual(sorted(os.listdir(self.generations)), sorted(["legacy", os.path.basename(staging)]))
+        with open(os.path.join(legacy, "index.html"), encoding="utf-8") as page_file:
+            self.assertEqual(page_file.read(), "legacy")
+
+    def test_reuse_clones_with_hardlinks(self):
+        first = self.publish("first")
+        self.write("generations/" + os.path.basename(first) + "/css/site.css", "body {}")
+        staging = stage_generation(self.public, self.generations)
+        for name in ("index.html", os.path.join("css", "site.css")):
+            self.assertTrue(os.path.samefile(os.path.join(first, name), os.path.join(staging, name)))
+        self.assertEqual(os.listdir(stage_generation(self.public, self.generations, reuse=False)), [])
+
+    def test_removes_old_generations(self):
+        first = self.publish("first")
+        abandoned = stage_generation(self.public, self.generations)
+        second = self.publish("second")
+        third = self.publish("third")
+        remaining = sorted(os.listdir(self.generations))
+        self.assertEqual(remaining, sorted(os.path.basename(path) for path in (second, third)))
+        self.assertFalse(os.path.exists(first))
+        self.assertFalse(os.path.exists(abandoned))
+
+
+if __name__ == "__main__":
+    unittest.main()
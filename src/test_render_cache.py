@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from render_cache import RenderCache, parser_version
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_get_put(self):
+        cache = RenderCache(self.directory.name)
+        self.assertIsNone(cache.get("# Title"))
+        cache.put("# Title", "<div><h1>Title</h1></div>")
+        self.assertEqual(cache.get("# Title"), "<div><h1>Title</h1></div>")
+        self.assertEqual(RenderCache(self.directory.name).get("# Title"), "<div><h1>Title</h1></div>")
+
+    def test_version(self):
+        self.assertEqual(parser_version(), parser_version())
+        RenderCache(self.directory.name, version="old").put("# Title", "<h1>old</h1>")
+        self.assertIsNone(RenderCache(self.directory.name, version="new").get("# Title"))
+
+    def test_evict_least_recently_used(self):
+        cache = RenderCache(self.directory.name, max_bytes=3500)
+        for i in range(3):
+            cache.put(f"page {i}", "x" * 1000)
+            path = cache._path(f"page {i}")
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        # Reading page 0 makes it the most recently used entry
+        cache.get("page 0")
+        cache.put("page 3", "x" * 1000)
+        self.assertIsNotNone(cache.get("page 0"))
+        self.assertIsNone(cache.get("page 1"))
+        self.assertIsNone(cache.get("page 2"))
+        self.assertIsNotNone(cache.get("page 3"))
+
+    def test_overwrite_keeps_size(self):
+        cache = RenderCache(self.directory.name, max_bytes=3500)
+        for _ in range(5):
+            cache.put("page", "x" * 1000)
+        self.assertEqual(cache._size, 1000)
+        cache.put("page", "x" * 400)
+        self.assertEqual(cache._size, 400)
+        self.assertEqual(cache.get("page"), "x" * 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import os
+import tempfile
+import unittest
+from htmlnode import LeafNode, ParentNode
+from template import Placeholder, Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template.compile("<title>{{ Title }}</title><p>{{Content}}</p>")
+        self.assertListEqual(
+            template.segments,
+            [
+                "<title>",
+                Placeholder("Title", "{{ Title }}"),
+                "</title><p>",
+                Placeholder("Content", "{{Content}}"),
+                "</p>",
+            ],
+        )
+        self.assertEqual(template.names, {"Title", "Content"})
+
+    def test_render(self):
+        template = Template.compile("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Author }}</p>")
+        html = template.render(
+            {
+                "Title": "Home",
+                "Content": ParentNode("div", [LeafNode("b", "bold")]),
+                "Author": "Bilbo",
+            }
+        )
+        self.assertEqual(html, "<h1>Home</h1><div><b>bold</b></div><p>Bilbo</p>")
+
+    def test_render_missing_placeholder(self):
+        template = Template.compile("<h1>{{ Title }}</h1>{{ Date }}")
+        self.assertEqual(template.render({"Title": "Home"}), "<h1>Home</h1>{{ Date }}")
+
+    def test_write(self):
+        template = Template.compile("<h1>{{ Title }}</h1><article>{{ Content }}</article>")
+        context = {"Title": "Home", "Content": ParentNode("div", [LeafNode("i", "italic")])}
+        sink = io.StringIO()
+        template.write(sink, context)
+        self.assertEqual(sink.getvalue(), template.render(context))
+
+    def test_load_template_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "template.html")
+            with open(path, "w", encoding="utf-8") as template_file:
+                template_file.write("<h1>{{ Title }}</h1>")
+            template = load_template(path)
+            self.assertIs(load_template(path), template)
+
+            with open(path, "w", encoding="utf-8") as template_file:
+                template_file.write("<h2>{{ Title }}</h2>")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(load_template(path).render({"Title": "Home"}), "<h2>Home</h2>")
+
+    def test_load_template_partials(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, "partials"))
+            paths = {
+                "template.html": "{{> partials/head.html }}<p>{{ Content }}</p>",
+                "partials/head.html": "<h1>{{ Title }}</h1>{{>nav.html}}",
+                "partials/nav.html": "<nav></nav>",
+            }
+            for name, content in paths.items():
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as template_file:
+                    template_file.write(content)
+            path = os.path.join(directory, "template.html")
+            template = load_template(path)
+            self.assertEqual(template.render({"Title": "Home", "Content": "x"}), "<h1>Home</h1><nav></nav><p>x</p>")
+            self.assertListEqual(template.dependencies, [os.path.join(directory, name) for name in paths])
+
+            with open(os.path.join(directory, "partials/nav.html"), "w", encoding="utf-8") as template_file:
+                template_file.write("{{> head.html }}")
+            os.utime(os.path.join(directory, "partials/nav.html"), ns=(0, 0))
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
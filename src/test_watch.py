@@ -0,0 +1,67 @@
+import os
+import unittest
+from etags import load_etags
+from generate import generate_pages_recursive
+from manifest import Manifest
+from publish import publish_generation, stage_generation
+from site_test_case import SiteTestCase
+from watch import SiteWatcher
+
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/logo.png", "png")
+        self.write("content/index.md", "# Home")
+        self.write("content/logo/index.md", "# Logo\n\n![logo](/logo.png)")
+        self.public = self.path("public")
+        generations = self.path("generations")
+        self.manifest = Manifest(self.path("manifest.json"))
+        staging = stage_generation(self.public, generations)
+        generate_pages_recursive(
+            self.path("content"), self.path("template.html"), staging, self.manifest,
+            static_dir=self.path("static"),
+        )
+        publish_generation(self.public, staging, generations)
+        self.watcher = SiteWatcher(
+            self.path("content"), self.path("template.html"), self.path("static"), self.public, self.manifest,
+            copy_strategy="copy",
+        )
+
+    def rebuild(self, *names):
+        return self.watcher.rebuild([self.path(name) for name in names])
+
+    def read(self, name):
+        with open(os.path.join(self.public, name), encoding="utf-8") as page_file:
+            return page_file.read()
+
+    def test_rebuild_page(self):
+        self.write("content/index.md", "# Welcome")
+        self.assertEqual(self.rebuild("content/index.md"), ["index.html"])
+        self.assertEqual(self.read("index.html"), "<title>Welcome</title><div><h1>Welcome</h1></div>")
+        self.assertEqual(list(load_etags(self.public)), ["index.html"])
+
+    def test_rebuild_dependents(self):
+        self.write("static/logo.png", "gif")
+        self.assertEqual(self.rebuild("static/logo.png"), ["logo.png", "logo/index.html"])
+        self.assertEqual(self.read("logo.png"), "gif")
+
+        self.write("template.html", "<h1>{{ Title }}</h1>")
+        self.assertEqual(self.rebuild("template.html"), ["index.html", "logo/index.html"])
+        self.assertEqual(self.read("logo/index.html"), "<h1>Logo</h1>")
+
+    def test_rebuild_created_and_deleted_pages(self):
+        self.write("content/new.md", "# New")
+        os.remove(self.path("content/index.md"))
+        self.assertEqual(self.rebuild("content/new.md", "content/index.md"), ["index.html", "new.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertEqual(self.read("new.html"), "<title>New</title><div><h1>New</h1></div>")
+        self.assertFalse(os.path.exists(self.path("manifest.json")))
+        self.watcher.stop()
+        pages = Manifest.load(self.path("manifest.json")).pages
+        self.assertEqual(sorted(pages), [self.path("content/logo/index.md"), self.path("content/new.md")])
+
+
+if __name__ == "__main__":
+    unittest.main()
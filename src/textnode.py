@@ -9,6 +9,8 @@ text_type_link = "link"
 text_type_image = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url", "src", "alt")
+
     def __init__(self, text, text_type, url=None, src=None, alt=None):
         """
         Initializes a new instance of the TextNode class.
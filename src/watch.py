@@ -0,0 +1,274 @@
+import contextlib
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from compress import ENCODINGS, compress_outputs
+from copy_static import copy_file
+from etags import write_etags
+from generate import render_pages
+from log import get_logger
+from publish import current_generation
+
+logger = get_logger(__name__)
+
+# Files written by editors and by the build itself, which never need a rebuild
+IGNORED_SUFFIXES = (".tmp", "~", ".swp", ".swx")
+
+
+class SiteWatcher:
+    """
+    Keeps the published site up to date with its sources from a long-lived process.
+
+    Attributes:
+        content_dir (str): The directory containing the markdown files.
+        template_path (str): The path to the template file.
+        static_dir (str): The directory containing the static files.
+        public_dir (str): The public directory, a symlink to the published generation.
+        manifest (Manifest): The manifest of the last build, kept in memory and saved once the rebuilds are idle,
+            see `flush()`.
+        cache (RenderCache): A cache of rendered HTML, or None.
+        copy_strategy (str): How changed static files are published, see `copy_file()`.
+        compress (bool): Whether to write precompressed siblings of the changed files, see `compress_outputs()`.
+        debounce (float): How long, in seconds, the filesystem has to stay quiet before a burst of events is rebuilt.
+        listeners (list): Callables that are passed the output paths, relative to the public directory, changed by
+            each rebuild.
+
+    A rebuild only touches the pages affected by the changed files: markdown files that were edited, created or
+    deleted, and the pages that the manifest's dependency graph lists as depending on a changed template, partial or
+    static file. The pages are rendered in this process, so the compiled template and the manifest stay warm between
+    edits. Every output is written to a temporary file and renamed over the old one, which lets the rebuild update
+    the published generation in place rather than staging a new generation for each edit.
+    """
+    def __init__(self, content_dir, template_path, static_dir, public_dir, manifest, cache=None,
+                 copy_strategy="auto", compress=False, debounce=0.03):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.public_dir = public_dir
+        self.manifest = manifest
+        self.cache = cache
+        self.copy_strategy = copy_strategy
+        self.compress = compress
+        self.debounce = debounce
+        self.listeners = []
+        self._events = queue.Queue()
+        self._stopped = threading.Event()
+        self._observer = None
+        self._watched = set()
+        self._thread = None
+        self._dirty = False
+
+    def rebuild(self, paths):
+        """
+        Brings the published site up to date with a set of changed files.
+
+        Args:
+            paths (iterable): The paths of the files that were modified, created or deleted.
+
+        Returns:
+            list: The output paths that changed, relative to the public directory, sorted.
+        """
+        started = time.perf_counter()
+        output_dir = current_generation(self.public_dir)
+        if output_dir is None:
+            logger.warning("Nothing is published at %s yet, skipping rebuild", self.public_dir)
+            return []
+        content_dir = os.path.abspath(self.content_dir)
+        static_dir = os.path.abspath(self.static_dir)
+        graph = self.manifest.graph
+        inputs = {os.path.abspath(path): path for path in graph.dependents}
+        changed = set()
+        pages = set()
+        changed_inputs = []
+        for path in sorted({os.path.abspath(path) for path in paths}):
+            relative_path = _relative_to(path, content_dir)
+            if relative_path is not None:
+                from_path = os.path.join(self.content_dir, relative_path)
+                if os.path.isfile(from_path):
+                    pages.add(from_path)
+                else:
+                    dest_path = self.manifest.remove(from_path, output_dir)
+                    if dest_path is not None:
+                        logger.debug("Removed stale page %s", dest_path)
+                        changed.add(os.path.relpath(dest_path, output_dir))
+                continue
+            relative_path = _relative_to(path, static_dir)
+            if relative_path is not None and self._sync_static(path, relative_path, output_dir):
+                changed.add(relative_path)
+            if path in inputs:
+                changed_inputs.append(inputs[path])
+        pages.update(graph.affected(graph.changed_inputs(changed_inputs)))
+
+        stale = []
+        for from_path in sorted(pages):
+            entry = self.manifest.pages.get(from_path)
+            if entry is not None:
+                dest_path = os.path.join(output_dir, entry["dest"])
+            else:
+                relative_path = os.path.relpath(from_path, self.content_dir)
+                dest_path = str(Path(output_dir, relative_path).with_suffix(".html"))
+            stale.append((from_path, dest_path))
+        results = render_pages(stale, self.template_path, 1, self.cache, self.static_dir)
+        for (from_path, dest_path), page_inputs in zip(stale, results):
+            if page_inputs is None:
+                self.manifest.forget(from_path)
+                continue
+            source_hash, stat = self.manifest.source_hash(from_path)
+            relative_path = os.path.relpath(dest_path, output_dir)
+            self.manifest.record(from_path, relative_path, source_hash, stat)
+            graph.set_inputs(from_path, page_inputs)
+            changed.add(relative_path)
+
+        if self.compress:
+            compress_outputs(output_dir, changed, assets=self.manifest.assets)
+        write_etags(output_dir, changed | {path + suffix for path in changed for suffix in ENCODINGS})
+        self._dirty = True
+        changed = sorted(changed)
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(
+            "Rebuilt %d file(s) in %.1f ms", len(changed), elapsed, extra={"changed": changed, "milliseconds": elapsed}
+        )
+        for listener in self.listeners:
+            listener(changed)
+        return changed
+
+    def flush(self):
+        """
+        Saves the manifest if a rebuild changed it since it was last saved.
+
+        Saving writes the entries of every page, which takes longer than rebuilding a page on a large site, so
+        rebuilds only update the manifest in memory. It is saved when no event arrived for half a second and when
+        the watcher stops, so a burst of edits costs one save and the next build still starts from an up to date
+        manifest.
+        """
+        if self._dirty:
+            self.manifest.save()
+            self._dirty = False
+
+    def _sync_static(self, from_path, relative_path, output_dir):
+        """
+        Copies a changed static file to the published generation, or removes it if it was deleted.
+
+        Returns:
+            bool: True if the published file changed.
+        """
+        dest_path = os.path.join(output_dir, relative_path)
+        if os.path.isfile(from_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_file(from_path, dest_path, self.copy_strategy)
+            self.manifest.assets.add(relative_path)
+            return True
+        self.manifest.assets.discard(relative_path)
+        try:
+            os.remove(dest_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def start(self):
+        """
+        Starts watching the content directory, the static directory and the directories of the template and its
+        partials, and rebuilding on a background thread.
+        """
+        # Imported here so that rebuilds can be driven without watchdog installed, as the tests do
+        from watchdog.observers import Observer
+
+        self._stopped.clear()
+        self._observer = Observer()
+        self._schedule()
+        self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="site-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s, %s and %s for changes", self.content_dir, self.static_dir, self.template_path)
+
+    def stop(self):
+        """
+        Stops watching and waits for a rebuild in progress to finish.
+        """
+        self._stopped.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def run_forever(self):
+        """
+        Watches and rebuilds until interrupted with Ctrl-C.
+        """
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def dispatch(self, event):
+        """
+        Receives a filesystem event from the watchdog observer and queues the paths it touched.
+
+        Args:
+            event (watchdog.events.FileSystemEvent): The event.
+        """
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and not path.endswith(IGNORED_SUFFIXES):
+                self._events.put(path)
+
+    def _schedule(self):
+        """
+        Starts watching the source directories that are not watched yet. The directories of the template and its
+        partials are watched without their subdirectories, since they may contain the output of the build.
+        """
+        directories = {(self.content_dir, True), (self.static_dir, True)}
+        static_dir = os.path.abspath(self.static_dir)
+        for path in [self.template_path, *self.manifest.graph.dependents]:
+            if _relative_to(os.path.abspath(path), static_dir) is None:
+                directories.add((os.path.dirname(path) or ".", False))
+        for directory, recursive in sorted(directories):
+            key = (os.path.abspath(directory), recursive)
+            if key in self._watched or not os.path.isdir(directory):
+                continue
+            self._observer.schedule(self, directory, recursive=recursive)
+            self._watched.add(key)
+
+    def _run(self):
+        """
+        Collects bursts of events and rebuilds once the filesystem has been quiet for `debounce` seconds.
+        """
+        while not self._stopped.is_set():
+            try:
+                paths = {self._events.get(timeout=0.5)}
+            except queue.Empty:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.exception("Saving the manifest failed. %s", e)
+                continue
+            while True:
+                try:
+                    paths.add(self._events.get(timeout=self.debounce))
+                except queue.Empty:
+                    break
+            try:
+                self.rebuild(paths)
+            except Exception as e:
+                logger.exception("Rebuild failed. %s", e)
+            with contextlib.suppress(Exception):
+                self._schedule()
+
+
+def _relative_to(path, directory):
+    """
+    Returns:
+        str: The path relative to the directory, or None if it is not inside the directory.
+    """
+    if path.startswith(directory + os.sep):
+        return os.path.relpath(path, directory)
+    return None